@@ -0,0 +1 @@
+"""Offline benchmarks for hot paths; run modules with ``python -m benchmarks.<name>``."""
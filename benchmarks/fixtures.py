@@ -0,0 +1,103 @@
+"""Synthetic but realistically shaped PESU Academy data for offline benchmarks.
+
+Shapes and field contents follow what the portal returns: a profile with a
+base64 photo, semester results with ISA/ESA assessments, and course trees of
+units, topics and material links. Everything is generated deterministically.
+"""
+
+import base64
+import random
+
+from pesuacademy.models import (
+    AddressDetails,
+    Assessment,
+    Course,
+    CourseResult,
+    Credits,
+    MaterialLink,
+    OtherInformation,
+    ParentDetails,
+    ParentInformation,
+    PersonalDetails,
+    Profile,
+    QualifyingExamination,
+    SemesterResult,
+    Topic,
+    Unit,
+)
+
+SEED = 2024
+IMAGE_BYTES = 48 * 1024
+
+
+def make_profile(image_bytes=IMAGE_BYTES, semester="Sem-4", seed=SEED):
+    rng = random.Random(seed)
+    image = base64.b64encode(rng.randbytes(image_bytes)).decode() if image_bytes else None
+    parent = ParentDetails(
+        name="Parent Name", mobile="9000000000", email="parent@example.com",
+        occupation="Engineer", qualification="B.E.", designation="Manager", employer="Example Ltd",
+    )
+    return Profile(
+        personal=PersonalDetails(
+            name="Student Example Name", pesu_id="PES1202400000", srn="PES1UG24CS000",
+            program="Bachelor of Technology", branch="Computer Science and Engineering",
+            semester=semester, section="Section C", email_id="student@example.com",
+            contact_no="9000000001", aadhar_no=None, name_as_in_aadhar="Student Example Name",
+            image=image,
+        ),
+        other_info=OtherInformation(sslc_marks="95", puc_marks="94", date_of_birth="01-01-2006", blood_group="O+"),
+        qualifying_exam=QualifyingExamination(exam="PESSAT", rank="1234", score="150"),
+        parents=ParentInformation(father=parent, mother=parent),
+        address=AddressDetails(present="1 Example Road, Bengaluru", permanent="1 Example Road, Bengaluru"),
+    )
+
+
+def make_results(courses=10, assessments=6, seed=SEED):
+    rng = random.Random(seed)
+    names = ["ISA1", "ISA2", "Assignment", "Lab", "Quiz", "ESA", "Project", "Viva"]
+    return SemesterResult(
+        sgpa=f"{rng.uniform(6, 10):.2f}",
+        credits=Credits(earned=str(courses * 4), total=str(courses * 4)),
+        courses=[
+            CourseResult(
+                code=f"UE24CS{200 + i}A",
+                title=f"Course Title Number {i}",
+                credits=Credits(earned="4", total="4"),
+                assessments=[
+                    Assessment(name=names[j % len(names)], marks=str(rng.randint(10, 40)), total="40")
+                    for j in range(assessments)
+                ],
+            )
+            for i in range(courses)
+        ],
+    )
+
+
+def make_courses(count=10):
+    return [
+        Course(code=f"UE24CS{200 + i}A", title=f"Course Title Number {i}", type="CC", status="Enrolled", id=str(20000 + i))
+        for i in range(count)
+    ]
+
+
+def make_course_tree(units=5, topics=20, materials=3, course_id="20000"):
+    """A course tree shaped like course_tree.fetch_course_tree() output."""
+    tree = []
+    for u in range(units):
+        unit = Unit(title=f"Unit {u + 1}: Unit Title", id=f"{course_id}{u:02d}")
+        unit_topics = []
+        for t in range(topics):
+            topic = Topic(title=f"Topic {t + 1} of unit {u + 1}", id=f"{unit.id}{t:03d}", course_id=course_id, unit_id=unit.id)
+            links = {
+                "2": [
+                    MaterialLink(
+                        title=f"Material {m + 1}",
+                        url=f"https://www.pesuacademy.com/Academy/s/referenceMeterials/downloadslidecoursedoc/{topic.id}{m}",
+                        is_pdf=m % 2 == 0,
+                    )
+                    for m in range(materials)
+                ]
+            }
+            unit_topics.append((topic, links))
+        tree.append((unit, unit_topics))
+    return tree
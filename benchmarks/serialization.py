@@ -0,0 +1,75 @@
+"""Compare cache serialization formats for PESU data.
+
+Measures encoded size and encode/decode time for the JSON path used by the
+session cookie (model_dump + json), pickle (the previous cache format) and the
+schema-aware msgpack format in serialization.py.
+
+Usage: python -m benchmarks.serialization [--repeat N]
+"""
+
+import json
+import pickle
+import sys
+import timeit
+
+from pesuacademy.models import Profile, SemesterResult
+
+import serialization
+from benchmarks.fixtures import make_course_tree, make_profile, make_results
+
+
+def json_dumps(value):
+    return json.dumps(value.model_dump()).encode()
+
+
+def json_loads_for(cls):
+    return lambda data: cls.model_validate(json.loads(data))
+
+
+def tree_json_dumps(tree):
+    return json.dumps([
+        [unit.model_dump(), [[topic.model_dump(), {k: [m.model_dump() for m in v] for k, v in mats.items()}] for topic, mats in topics]]
+        for unit, topics in tree
+    ]).encode()
+
+
+def tree_json_loads(data):
+    from pesuacademy.models import MaterialLink, Topic, Unit
+
+    return [
+        (Unit.model_validate(unit), [
+            (Topic.model_validate(topic), {k: [MaterialLink.model_validate(m) for m in v] for k, v in mats.items()})
+            for topic, mats in topics
+        ])
+        for unit, topics in json.loads(data)
+    ]
+
+
+def measure(dumps, loads, value, repeat):
+    data = dumps(value)
+    encode = min(timeit.repeat(lambda: dumps(value), number=1, repeat=repeat))
+    decode = min(timeit.repeat(lambda: loads(data), number=1, repeat=repeat))
+    return len(data), encode * 1000, decode * 1000
+
+
+def main(repeat=50):
+    cases = [
+        ("profile", "profile", make_profile(), json_dumps, json_loads_for(Profile)),
+        ("results", "results", make_results(), json_dumps, json_loads_for(SemesterResult)),
+        ("course tree", "course_tree", make_course_tree(), tree_json_dumps, tree_json_loads),
+    ]
+    print(f"{'data':<12} {'format':<8} {'bytes':>9} {'encode ms':>10} {'decode ms':>10}")
+    for name, schema, value, j_dumps, j_loads in cases:
+        formats = [
+            ("json", j_dumps, j_loads),
+            ("pickle", pickle.dumps, pickle.loads),
+            ("msgpack", lambda v: serialization.dumps(v, schema), serialization.loads),
+        ]
+        for fmt, dumps, loads in formats:
+            size, encode, decode = measure(dumps, loads, value, repeat)
+            print(f"{name:<12} {fmt:<8} {size:>9} {encode:>10.3f} {decode:>10.3f}")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 50
+    main(repeat)
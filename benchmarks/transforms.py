@@ -0,0 +1,150 @@
+"""CPU benchmarks for the pure-Python transforms the pages run on every rerun.
+
+Covers semester parsing, profile normalisation, the per-course grade loop,
+the course selectbox options, session cookie encode/decode and the "new
+material" count over a course snapshot. Fixture sizes are multiplied by
+--scale. Results are compared with the saved baselines in baselines.json, and
+the run fails if any case is slower than its baseline by more than
+--threshold (a ratio).
+
+Usage: python -m benchmarks.transforms [--scale N] [--repeat N] [--threshold R] [--save]
+"""
+
+import json
+import os
+import sys
+import timeit
+
+from benchmarks.fixtures import IMAGE_BYTES, make_course_tree, make_courses, make_profile, make_results
+from course_sync import count_new_materials
+from page_utils import (
+    course_options,
+    decode_session_cookie,
+    encode_session_cookie,
+    parse_semester,
+    profile_field,
+    profile_to_dict,
+    summarize_course,
+)
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 1.5
+
+
+def make_snapshot(tree):
+    """A course_sync snapshot with the same shape as a course tree."""
+    return {
+        "course_id": "20000",
+        "synced_at": 1.0,
+        "units": {
+            unit.id: {
+                "title": unit.title, "changed_at": 1.0, "signature": "",
+                "topics": {
+                    topic.id: {
+                        "title": topic.title, "changed_at": 1.0,
+                        "materials": {
+                            type_id: {
+                                "checked_at": 1.0, "changed_at": 1.0, "signature": "",
+                                "items": [
+                                    {"title": m.title, "url": m.url, "is_pdf": m.is_pdf, "seen_at": float(i % 3)}
+                                    for i, m in enumerate(links)
+                                ],
+                            }
+                            for type_id, links in materials.items()
+                        },
+                    }
+                    for topic, materials in topics
+                },
+            }
+            for unit, topics in tree
+        },
+    }
+
+
+def make_cases(scale):
+    """Case name -> function to time, with fixtures built up front."""
+    semesters = ["Sem-4", "4", 4, "Sem-10", "bad", None] * (100 * scale)
+    profile = make_profile(image_bytes=IMAGE_BYTES * scale)
+    profile_dict = profile.model_dump()
+    results = make_results(courses=10 * scale)
+    courses = make_courses(10 * scale)
+    cookie = encode_session_cookie("PES1UG24CS001", "password", profile_dict, "image-key")
+    snapshot = make_snapshot(make_course_tree(units=5, topics=20 * scale))
+
+    def profile_normalisation():
+        data = profile_to_dict(profile)
+        for field in ("name", "program", "branch", "section", "semester", "srn"):
+            profile_field(data, field)
+            profile_field(profile, field)
+
+    return {
+        "semester_parsing": lambda: [parse_semester(value) for value in semesters],
+        "profile_normalisation": profile_normalisation,
+        "grade_loop": lambda: [summarize_course(course) for course in results.courses],
+        "course_options": lambda: course_options(courses),
+        "cookie_encode": lambda: encode_session_cookie("PES1UG24CS001", "password", profile_dict, "image-key"),
+        "cookie_decode": lambda: decode_session_cookie(cookie),
+        "new_material_count": lambda: count_new_materials(snapshot, 1.5),
+    }
+
+
+def measure(cases, repeat):
+    """Best time per call of each case, in microseconds."""
+    timings = {}
+    for name, func in cases.items():
+        number, _ = timeit.Timer(func).autorange()
+        timings[name] = min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+    return timings
+
+
+def load_baselines(path=BASELINES_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baselines(baselines, path=BASELINES_FILE):
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(scale=1, repeat=5, threshold=DEFAULT_THRESHOLD, save=False):
+    timings = measure(make_cases(scale), repeat)
+    baselines = load_baselines()
+    regressions = []
+    print(f"{'case':<22} {'us/call':>10} {'baseline':>10} {'ratio':>7}")
+    for name, micros in timings.items():
+        key = f"{name}@{scale}"
+        baseline = baselines.get(key)
+        ratio = micros / baseline if baseline else None
+        flag = ""
+        if ratio is not None and ratio > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<22} {micros:>10.2f} {baseline if baseline else '-':>10} "
+            f"{f'{ratio:.2f}' if ratio is not None else '-':>7}{flag}"
+        )
+        if save:
+            baselines[key] = round(micros, 2)
+    if save:
+        save_baselines(baselines)
+        print(f"Saved baselines for scale {scale} to {BASELINES_FILE}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) slower than {threshold}x baseline")
+    return not regressions or save
+
+
+if __name__ == "__main__":
+    def option(name, default, cast):
+        return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+    ok = main(
+        scale=option("--scale", 1, int),
+        repeat=option("--repeat", 5, int),
+        threshold=option("--threshold", DEFAULT_THRESHOLD, float),
+        save="--save" in sys.argv,
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,172 @@
+"""Pluggable cache backends shared by the Streamlit pages.
+
+The in-process backend is the default. Set ``PESU_CACHE_BACKEND=sqlite`` (and
+optionally ``PESU_CACHE_PATH``) to share one cache between every worker process
+on the same host.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from serialization import dumps, loads, schema_for_key
+
+CACHE_BACKEND_ENV = "PESU_CACHE_BACKEND"
+CACHE_PATH_ENV = "PESU_CACHE_PATH"
+DEFAULT_CACHE_PATH = os.path.join(".cache", "pesu_cache.sqlite3")
+
+# Default lifetimes (seconds) for the data we cache
+CATALOG_TTL = 6 * 60 * 60
+RESULTS_TTL = 60 * 60
+# Empty catalog lists may just be a hiccup upstream, so they are kept briefly
+EMPTY_CATALOG_TTL = 5 * 60
+
+
+def catalog_ttl(value):
+    """Lifetime for a fetched catalog list: short if it came back empty."""
+    return CATALOG_TTL if value else EMPTY_CATALOG_TTL
+
+
+def cache_key(*parts):
+    """Build a namespaced cache key from its parts."""
+    return ":".join(str(part) for part in parts)
+
+
+class CacheBackend:
+    """Interface every cache backend implements."""
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, expiring after ttl seconds if given."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove key from the cache."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Cache that lives inside the current process only."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a SQLite file in WAL mode, shared by all local processes."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        conn.commit()
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        try:
+            return loads(value)
+        except Exception:
+            self.delete(key)
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, dumps(value, schema_for_key(key)), expires_at),
+        )
+        conn.commit()
+
+    def delete(self, key):
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM cache")
+        conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_cache(backend=None, path=None):
+    """Create a cache backend by name ("memory" or "sqlite")."""
+    backend = (backend or os.environ.get(CACHE_BACKEND_ENV, "memory")).lower()
+    if backend == "sqlite":
+        return SQLiteCache(path or os.environ.get(CACHE_PATH_ENV, DEFAULT_CACHE_PATH))
+    if backend == "memory":
+        return MemoryCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def get_cache():
+    """Get the process-wide cache backend, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
@@ -0,0 +1,3 @@
+# The tests live in tests/; these root scripts prompt for credentials or read
+# local files, so pytest must not import them.
+collect_ignore = ["pesuacademy_test.py", "test_session_load.py"]
@@ -0,0 +1,124 @@
+"""Per-course aggregates computed once when a course tree is synced.
+
+Every sync of a course (see course_sync.py) rewrites that course's rows in a
+small SQLite table keyed by (course_id, unit_id). Each row holds the unit's
+topic, material and PDF counts and the PDF bytes known from the metadata
+probe. The Courses page reads a course's rows with one primary-key range
+lookup, instead of walking the tree for every viewer.
+
+Budgeted syncs read only some material lists, so each row also records how
+many of its lists (topics x material types) have been checked. Until every
+list has been, the material and PDF counts are lower bounds.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from course_tree import MATERIAL_TYPES
+from material_probe import get_metadata
+
+COURSE_STATS_FILE = os.path.join(".cache", "course_stats.sqlite3")
+# Bump when the table changes; rows are derived, so old ones are just dropped
+SCHEMA_VERSION = 2
+
+
+def unit_stats(unit):
+    """(topics, materials, pdfs, pdf_bytes, lists_checked, lists_total) for one snapshot unit."""
+    topics = materials = pdfs = pdf_bytes = lists_checked = 0
+    for topic in unit["topics"].values():
+        topics += 1
+        for entry in topic["materials"].values():
+            if entry.get("checked_at"):
+                lists_checked += 1
+            for item in entry["items"]:
+                materials += 1
+                if item["is_pdf"]:
+                    pdfs += 1
+                    pdf_bytes += (get_metadata(item["url"]) or {}).get("size") or 0
+    return topics, materials, pdfs, pdf_bytes, lists_checked, topics * len(MATERIAL_TYPES)
+
+
+class CourseStats:
+    """Table of (course_id, unit_id) -> unit aggregates."""
+
+    def __init__(self, path=COURSE_STATS_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Rebuilt by the next sync of each course
+            conn.execute("DROP TABLE IF EXISTS unit_stats")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS unit_stats ("
+            "course_id TEXT NOT NULL, unit_id TEXT NOT NULL, position INTEGER NOT NULL, title TEXT, "
+            "topics INTEGER, materials INTEGER, pdfs INTEGER, pdf_bytes INTEGER, "
+            "lists_checked INTEGER, lists_total INTEGER, updated_at REAL, "
+            "PRIMARY KEY (course_id, unit_id)) WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def refresh(self, snapshot):
+        """Recompute and replace the rows of a synced course."""
+        now = time.time()
+        course_id = str(snapshot["course_id"])
+        rows = [
+            (course_id, str(unit_id), position, unit["title"], *unit_stats(unit), now)
+            for position, (unit_id, unit) in enumerate(snapshot["units"].items())
+        ]
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM unit_stats WHERE course_id = ?", (course_id,))
+            conn.executemany("INSERT INTO unit_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def summary(self, course_id):
+        """Totals and per-unit rows of a course, or None if it was never synced.
+
+        "complete" is False while some material lists are still unchecked.
+        """
+        rows = self._connect().execute(
+            "SELECT title, topics, materials, pdfs, pdf_bytes, lists_checked, lists_total, updated_at "
+            "FROM unit_stats WHERE course_id = ? ORDER BY position",
+            (str(course_id),),
+        ).fetchall()
+        if not rows:
+            return None
+        units = [
+            {
+                "unit": title, "topics": topics, "materials": materials, "pdfs": pdfs, "pdf_bytes": pdf_bytes,
+                "lists_checked": lists_checked, "lists_total": lists_total,
+                "complete": lists_checked >= lists_total,
+            }
+            for title, topics, materials, pdfs, pdf_bytes, lists_checked, lists_total, _ in rows
+        ]
+        summary = {
+            key: sum(u[key] for u in units)
+            for key in ("topics", "materials", "pdfs", "pdf_bytes", "lists_checked", "lists_total")
+        }
+        summary.update(units=units, complete=all(u["complete"] for u in units), updated_at=rows[0][7])
+        return summary
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_course_stats():
+    """Get the process-wide course stats table."""
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = CourseStats()
+    return _stats
@@ -0,0 +1,226 @@
+"""Incremental sync of course trees with per-node change times.
+
+The last known tree of every course is saved under .cache/course_trees/. Each
+unit, topic and (topic, material type) node keeps a signature of its children
+plus the time it last changed. The portal offers no change feed, and material
+lists are the expensive level: one request per topic per material type. So a
+refresh re-reads the cheap unit and topic lists in full, and spends at most a
+fixed number of material requests. Lists never read come first (which covers
+new topics), then the lists checked longest ago. Lists that came back empty
+several times in a row count as checked EMPTY_LIST_BACKOFF later than they
+were, so the budget goes mostly to material types the course actually uses.
+Over a few refreshes every list is rechecked, and a daily check costs a
+handful of requests instead of a full crawl.
+
+Per-user visit times live in .cache/course_visits/ and drive the "new since
+your last visit" badges.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from cache_backend import get_cache, cache_key, catalog_ttl
+from course_stats import get_course_stats
+from course_tree import MATERIAL_TYPES
+from pesu_client import check_session
+from scheduler import limited, request_limiter
+
+COURSE_TREES_DIR = os.path.join(".cache", "course_trees")
+COURSE_VISITS_DIR = os.path.join(".cache", "course_visits")
+MATERIAL_CHECKS_PER_SYNC = 20
+# Consecutive empty reads after which a list is rechecked less often
+EMPTY_CHECKS_BEFORE_BACKOFF = 2
+EMPTY_LIST_BACKOFF = 7 * 24 * 60 * 60
+
+
+def _signature(items):
+    return hashlib.sha1(json.dumps(sorted(items)).encode()).hexdigest()[:16]
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def get_snapshot_file(course_id):
+    return os.path.join(COURSE_TREES_DIR, f"course_{course_id}.json")
+
+
+def load_snapshot(course_id):
+    """Last synced tree of a course, or an empty one."""
+    return _read_json(get_snapshot_file(course_id), {"course_id": course_id, "synced_at": None, "units": {}})
+
+
+def save_snapshot(snapshot):
+    _write_json(get_snapshot_file(snapshot["course_id"]), snapshot)
+
+
+def _merge_children(old_children, fetched, discovered_at, make_node):
+    """Rebuild a level from fetched (id, title) pairs, keeping known nodes' state."""
+    children = {}
+    for node_id, title in fetched:
+        node = old_children.get(node_id) or make_node(discovered_at)
+        node["title"] = title
+        children[node_id] = node
+    return children
+
+
+async def sync_course(pesu, course_id, snapshot=None, material_budget=MATERIAL_CHECKS_PER_SYNC, semaphore=None):
+    """Refresh a course tree in place and return (snapshot, summary of changes).
+
+    material_budget=None rechecks every material list (a full crawl). Courses
+    synced in the same operation should share one semaphore; by default each
+    call gets its own request_limiter().
+    """
+    semaphore = semaphore or request_limiter()
+    snapshot = snapshot or load_snapshot(course_id)
+    now = time.time()
+    # On the first sync nothing counts as new: nodes start with change time 0
+    discovered_at = now if snapshot["synced_at"] else 0
+    summary = {"units": 0, "topics": 0, "materials": 0, "requests": 0, "lists_checked": 0, "lists_stale": 0}
+
+    units = await limited(semaphore, pesu.get_units_for_course(course_id))
+    summary["requests"] += 1
+    old_units = snapshot["units"]
+    new_units = _merge_children(
+        old_units, [(u.id, u.title) for u in units], discovered_at,
+        lambda ts: {"changed_at": ts, "signature": None, "topics": {}},
+    )
+    summary["units"] = len(set(new_units) - set(old_units)) if old_units else 0
+
+    topic_lists = await asyncio.gather(*(limited(semaphore, pesu.get_topics_for_unit(u.id)) for u in units))
+    summary["requests"] += len(units)
+    topics_by_id = {}
+    for unit, topics in zip(units, topic_lists):
+        node = new_units[unit.id]
+        fetched = [(t.id, t.title) for t in topics or []]
+        signature = _signature(fetched)
+        if node["signature"] is not None and signature != node["signature"]:
+            node["changed_at"] = now
+            summary["topics"] += len(set(dict(fetched)) - set(node["topics"]))
+        node["signature"] = signature
+        node["topics"] = _merge_children(
+            node["topics"], fetched, discovered_at,
+            lambda ts: {"changed_at": ts, "materials": {}},
+        )
+        for topic in topics or []:
+            topics_by_id[topic.id] = (unit.id, topic)
+
+    # Pick which (topic, material type) lists to re-read this time
+    candidates = []
+    for topic_id, (unit_id, topic) in topics_by_id.items():
+        materials = new_units[unit_id]["topics"][topic_id]["materials"]
+        for type_id in MATERIAL_TYPES.values():
+            node = materials.get(type_id, {})
+            due = node.get("checked_at") or 0
+            if due and node.get("empty_checks", 0) >= EMPTY_CHECKS_BEFORE_BACKOFF:
+                due += EMPTY_LIST_BACKOFF
+            candidates.append((due, topic_id, type_id))
+    candidates.sort()
+    total_lists = len(candidates)
+    if material_budget is not None:
+        candidates = candidates[:material_budget]
+
+    results = await asyncio.gather(
+        *(limited(semaphore, pesu.get_material_links(topics_by_id[topic_id][1], type_id))
+          for _, topic_id, type_id in candidates),
+        return_exceptions=True
+    )
+    summary["requests"] += len(candidates)
+    # Empty lists from a rejected session must not overwrite the stored tree
+    check_session(pesu)
+    cache = get_cache()
+    for (_, topic_id, type_id), links in zip(candidates, results):
+        if isinstance(links, Exception):
+            continue
+        summary["lists_checked"] += 1
+        unit_id, topic = topics_by_id[topic_id]
+        topic_node = new_units[unit_id]["topics"][topic_id]
+        old = topic_node["materials"].get(type_id, {"signature": None, "items": []})
+        seen = {item["url"]: item["seen_at"] for item in old["items"]}
+        # A list read for the first time is only new if its topic is
+        first_seen = now if old["signature"] is not None else topic_node["changed_at"]
+        items = [
+            {"title": link.title, "url": link.url, "is_pdf": link.is_pdf, "seen_at": seen.get(link.url, first_seen)}
+            for link in links or []
+        ]
+        signature = _signature([(item["url"], item["title"]) for item in items])
+        changed = old["signature"] is not None and signature != old["signature"]
+        new_items = sum(item["url"] not in seen for item in items) if old["signature"] is not None else 0
+        topic_node["materials"][type_id] = {
+            "checked_at": now,
+            "changed_at": now if changed else old.get("changed_at", first_seen),
+            "signature": signature,
+            "items": items,
+            "empty_checks": 0 if items else old.get("empty_checks", 0) + 1,
+        }
+        if changed:
+            topic_node["changed_at"] = now
+            new_units[unit_id]["changed_at"] = now
+            summary["materials"] += new_items
+        # The page's material buttons can now be served from cache
+        cache.set(cache_key("materials", topic_id, type_id), links or [], ttl=catalog_ttl(links))
+
+    cache.set(cache_key("units", course_id), units, ttl=catalog_ttl(units))
+    for unit, topics in zip(units, topic_lists):
+        cache.set(cache_key("topics", unit.id), topics, ttl=catalog_ttl(topics))
+
+    # Lists not read this time, including any whose request failed
+    summary["lists_stale"] = total_lists - summary["lists_checked"]
+    snapshot["units"] = new_units
+    snapshot["synced_at"] = now
+    save_snapshot(snapshot)
+    get_course_stats().refresh(snapshot)
+    return snapshot, summary
+
+
+def get_visits_file(username):
+    user_hash = hashlib.sha256(str(username).encode()).hexdigest()[:16]
+    return os.path.join(COURSE_VISITS_DIR, f"visits_{user_hash}.json")
+
+
+def record_visit(username, course_id):
+    """Store now as the user's visit to a course; returns the previous visit time (or None)."""
+    path = get_visits_file(username)
+    visits = _read_json(path, {})
+    previous = visits.get(str(course_id))
+    visits[str(course_id)] = time.time()
+    _write_json(path, visits)
+    return previous
+
+
+def is_new(node, since):
+    """Whether a snapshot node (or material item) changed after since."""
+    if since is None or node is None:
+        return False
+    return node.get("changed_at", node.get("seen_at", 0)) > since
+
+
+def count_new_materials(snapshot, since):
+    """Number of material items first seen after since."""
+    if since is None:
+        return 0
+    return sum(
+        is_new(item, since)
+        for unit in snapshot["units"].values()
+        for topic in unit["topics"].values()
+        for materials in topic["materials"].values()
+        for item in materials["items"]
+    )
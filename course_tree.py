@@ -0,0 +1,47 @@
+"""Helpers for walking the course → unit → topic → material tree in one session."""
+
+import asyncio
+
+from scheduler import limited, request_limiter
+
+# Material type IDs understood by PESU Academy
+MATERIAL_TYPES = {
+    "Lecture Notes": "1",
+    "Assignments": "2",
+    "Question Papers": "3",
+    "Lab Materials": "4",
+    "Additional Resources": "5"
+}
+ASSIGNMENT_MATERIAL_TYPE = MATERIAL_TYPES["Assignments"]
+
+
+async def fetch_course_tree(pesu, course, material_type_ids=None, semaphore=None):
+    """Fetch the units, topics and materials of a course with one authenticated client.
+
+    Returns a list of (unit, [(topic, {material_type_id: [materials]})]) tuples.
+    Trees fetched in the same operation should share one semaphore.
+    """
+    material_type_ids = material_type_ids or list(MATERIAL_TYPES.values())
+    semaphore = semaphore or request_limiter()
+    units = await limited(semaphore, pesu.get_units_for_course(course.id))
+    topics_per_unit = await asyncio.gather(
+        *(limited(semaphore, pesu.get_topics_for_unit(unit.id)) for unit in units)
+    )
+
+    async def fetch_topic_materials(topic):
+        links = await asyncio.gather(
+            *(limited(semaphore, pesu.get_material_links(topic, type_id)) for type_id in material_type_ids),
+            return_exceptions=True
+        )
+        return {
+            type_id: materials
+            for type_id, materials in zip(material_type_ids, links)
+            if not isinstance(materials, Exception) and materials
+        }
+
+    tree = []
+    for unit, topics in zip(units, topics_per_unit):
+        topics = topics or []
+        materials = await asyncio.gather(*(fetch_topic_materials(topic) for topic in topics))
+        tree.append((unit, list(zip(topics, materials))))
+    return tree
@@ -1,11 +1,15 @@
 import streamlit as st
-import asyncio
-from pesuacademy import PESUAcademy
-import json
+from pesu_client import run_pesu
 import os
-from session_utils import restore_session_from_cookie
-
-restore_session_from_cookie()
+from fetch_scope import run_scoped
+from session_data import get_session_data
+from course_stats import get_course_stats
+from course_sync import sync_course, load_snapshot, record_visit, is_new, count_new_materials
+from cache_backend import get_cache, cache_key, catalog_ttl
+from course_tree import MATERIAL_TYPES
+from dedup import FILES_DIR, list_pdfs, load_index, describe_duplicate
+from page_utils import parse_semester, profile_field, course_options
+from material_probe import get_metadata, describe, probe_local, start_probe, is_probing
 
 # Check if user is logged in
 if not st.session_state.get('logged_in', False):
@@ -15,75 +19,100 @@ if not st.session_state.get('logged_in', False):
 
 st.title("📚 Courses & Materials")
 
-# Get profile to determine current semester
-profile = st.session_state.profile
-if isinstance(profile, dict):
-    personal = profile.get('personal', {})
-    sem_str = personal.get('semester', '1') if isinstance(personal, dict) else personal.get('semester', '1')
-else:
-    sem_str = profile.personal.semester
+# Fetches run on a background loop, so read credentials here rather than in them
+username = st.session_state.pesu_username
+password = st.session_state.pesu_password
 
-# Parse semester
-try:
-    if isinstance(sem_str, str):
-        current_sem = int(sem_str.split('-')[-1]) if '-' in sem_str else int(sem_str)
-    else:
-        current_sem = int(sem_str)
-except:
-    current_sem = 1
+# Fetched course data lives in a size-bounded area that evicts cold courses
+session_data = get_session_data()
+
+# Get profile to determine current semester
+current_sem = parse_semester(profile_field(st.session_state.profile, 'semester', '1'))
 
 async def fetch_courses(semester):
     """Fetch courses from PESU Academy API"""
+    cache = get_cache()
+    key = cache_key("courses", username, semester)
+    courses = cache.get(key)
+    if courses is not None:
+        return courses, None
     try:
-        pesu = await PESUAcademy.login(
-            st.session_state.pesu_username,
-            st.session_state.pesu_password
+        courses = await run_pesu(
+            username,
+            password,
+            lambda pesu: pesu.get_courses(semester)
         )
-        courses = await pesu.get_courses(semester)
-        await pesu.close()
+        cache.set(key, courses, ttl=catalog_ttl(courses))
         return courses, None
     except Exception as e:
         return None, str(e)
 
 async def fetch_units(course_id):
     """Fetch units for a course"""
+    cache = get_cache()
+    key = cache_key("units", course_id)
+    units = cache.get(key)
+    if units is not None:
+        return units, None
     try:
-        pesu = await PESUAcademy.login(
-            st.session_state.pesu_username,
-            st.session_state.pesu_password
+        units = await run_pesu(
+            username,
+            password,
+            lambda pesu: pesu.get_units_for_course(course_id)
         )
-        units = await pesu.get_units_for_course(course_id)
-        await pesu.close()
+        cache.set(key, units, ttl=catalog_ttl(units))
         return units, None
     except Exception as e:
         return None, str(e)
 
 async def fetch_topics(unit_id):
     """Fetch topics for a unit"""
+    cache = get_cache()
+    key = cache_key("topics", unit_id)
+    topics = cache.get(key)
+    if topics is not None:
+        return topics, None
     try:
-        pesu = await PESUAcademy.login(
-            st.session_state.pesu_username,
-            st.session_state.pesu_password
+        topics = await run_pesu(
+            username,
+            password,
+            lambda pesu: pesu.get_topics_for_unit(unit_id)
         )
-        topics = await pesu.get_topics_for_unit(unit_id)
-        await pesu.close()
+        cache.set(key, topics, ttl=catalog_ttl(topics))
         return topics, None
     except Exception as e:
         return None, str(e)
 
 async def fetch_materials(topic, material_type_id):
     """Fetch material links for a topic"""
+    cache = get_cache()
+    key = cache_key("materials", topic.id, material_type_id)
+    materials = cache.get(key)
+    if materials is not None:
+        return materials, None
     try:
-        pesu = await PESUAcademy.login(
-            st.session_state.pesu_username,
-            st.session_state.pesu_password
+        materials = await run_pesu(
+            username,
+            password,
+            lambda pesu: pesu.get_material_links(topic, material_type_id)
         )
-        materials = await pesu.get_material_links(topic, material_type_id)
-        await pesu.close()
+        cache.set(key, materials, ttl=catalog_ttl(materials))
         return materials, None
     except Exception as e:
         return None, str(e)
 
+async def sync_materials(course_id):
+    """Refresh the stored course tree and report what changed"""
+    try:
+        snapshot, summary = await run_pesu(
+            username,
+            password,
+            lambda pesu: sync_course(pesu, course_id)
+        )
+        return summary, None
+    except Exception as e:
+        return None, str(e)
+
 # Semester selector
 selected_sem = st.selectbox(
     "Select Semester:",
@@ -95,7 +124,7 @@ selected_sem = st.selectbox(
 # Fetch courses button
 if st.button("📥 Fetch Courses", type="primary", use_container_width=True):
     with st.spinner(f"Fetching semester {selected_sem} courses..."):
-        courses_dict, error = asyncio.run(fetch_courses(selected_sem))
+        courses_dict, error = run_scoped("Courses", "semester", selected_sem, fetch_courses(selected_sem))
         
         if error:
             st.error(f"Failed to fetch courses: {error}")
@@ -112,16 +141,22 @@ if 'courses' in st.session_state and st.session_state.courses:
     st.subheader(f"Semester {selected_sem} Courses")
     
     # Create course selection
-    course_options = {f"{course.code} - {course.title}": course for course in st.session_state.courses}
+    options = course_options(st.session_state.courses)
     
     selected_course_name = st.selectbox(
         "Select Course:",
-        options=list(course_options.keys()),
+        options=list(options.keys()),
         key="selected_course"
     )
     
     if selected_course_name:
-        selected_course = course_options[selected_course_name]
+        selected_course = options[selected_course_name]
+        
+        # Release what was loaded for the previously viewed course
+        previous_course_id = st.session_state.get('viewed_course_id')
+        if previous_course_id is not None and previous_course_id != selected_course.id:
+            session_data.drop_group(previous_course_id)
+        st.session_state.viewed_course_id = selected_course.id
         
         # Display course info
         col1, col2, col3 = st.columns(3)
@@ -132,80 +167,150 @@ if 'courses' in st.session_state and st.session_state.courses:
         with col3:
             st.metric("Status", selected_course.status)
         
+        # Totals precomputed when the course was last synced
+        stats = get_course_stats().summary(selected_course.id)
+        if stats:
+            # Counts from a partly checked tree are lower bounds
+            more = "" if stats["complete"] else "+"
+            stat_cols = st.columns(4)
+            stat_cols[0].metric("Units", len(stats["units"]))
+            stat_cols[1].metric("Topics", stats["topics"])
+            stat_cols[2].metric("Materials", f"{stats['materials']}{more}")
+            stat_cols[3].metric("PDFs", f"{stats['pdfs']}{more} ({stats['pdf_bytes'] / 1024 / 1024:.1f} MB)" if stats["pdf_bytes"] else f"{stats['pdfs']}{more}")
+            if not stats["complete"]:
+                st.caption(f"Partial: {stats['lists_checked']} of {stats['lists_total']} material lists checked so far. Check for new material to fill in the rest.")
+            with st.expander("📊 Per-Unit Breakdown"):
+                for unit in stats["units"]:
+                    size = f", {unit['pdf_bytes'] / 1024 / 1024:.1f} MB" if unit["pdf_bytes"] else ""
+                    partial = "" if unit["complete"] else f" *(partial: {unit['lists_checked']}/{unit['lists_total']} lists checked)*"
+                    st.markdown(f"**{unit['unit']}** — {unit['topics']} topics, {unit['materials']} materials, {unit['pdfs']} PDFs{size}{partial}")
+        
+        # Badges compare against the last visit before this browser session
+        visit_baselines = st.session_state.setdefault('visit_baselines', {})
+        if selected_course.id not in visit_baselines:
+            visit_baselines[selected_course.id] = record_visit(username, selected_course.id)
+        last_visit = visit_baselines[selected_course.id]
+        
+        if st.button("🔄 Check for New Material"):
+            with st.spinner("Checking for new material..."):
+                summary, error = run_scoped("Courses", "course", selected_course.id, sync_materials(selected_course.id))
+                
+                if error:
+                    st.error(f"Failed to check for new material: {error}")
+                else:
+                    st.success(f"Found {summary['materials']} new materials and {summary['topics']} new topics ({summary['requests']} requests)", icon=":material/check:")
+                    checked = f"Checked {summary['lists_checked']} material lists"
+                    if summary["lists_stale"]:
+                        st.caption(f"{checked}; {summary['lists_stale']} not rechecked yet, they are covered by the next checks.")
+                    else:
+                        st.caption(f"{checked}; every list is up to date.")
+        
+        snapshot = load_snapshot(selected_course.id)
+        new_count = count_new_materials(snapshot, last_visit)
+        if new_count:
+            st.info(f"🆕 {new_count} new materials since your last visit")
+        
+        # Local mirror of this course's files, with duplicates flagged
+        local_dir = os.path.join(FILES_DIR, selected_course.title)
+        if os.path.isdir(local_dir):
+            with st.expander("💾 Downloaded Files"):
+                dedup_index = load_index() or {"duplicates": {}}
+                for course_path in list_pdfs(local_dir):
+                    # The dedup index is keyed by paths relative to FILES_DIR
+                    rel_path = os.path.join(selected_course.title, course_path)
+                    label = os.path.splitext(course_path)[0].replace(os.sep, " ")
+                    label = f"{label} `{describe(probe_local(os.path.join(local_dir, course_path)))}`"
+                    duplicate = dedup_index["duplicates"].get(rel_path)
+                    if duplicate and duplicate["kind"] == "exact":
+                        st.markdown(f"📄 {label} — *same as {describe_duplicate(rel_path, duplicate['of'])}*")
+                    elif duplicate:
+                        st.markdown(f"📄 {label} — *{duplicate['similarity']:.0%} of pages match {describe_duplicate(rel_path, duplicate['of'])}*")
+                    else:
+                        st.markdown(f"📄 {label}")
+        
         # Fetch units for selected course
         if st.button("📖 Load Units & Materials", type="secondary"):
             with st.spinner("Loading units..."):
-                units, error = asyncio.run(fetch_units(selected_course.id))
+                units, error = run_scoped("Courses", "course", selected_course.id, fetch_units(selected_course.id))
                 
                 if error:
                     st.error(f"Failed to fetch units: {error}")
                 elif units:
-                    st.session_state.current_units = units
+                    session_data.put("current_units", units, group=selected_course.id)
                     st.session_state.current_course_id = selected_course.id
                     st.success(f"Loaded {len(units)} units!",icon=":material/check:")
                 else:
                     st.info("No units found for this course")
         
         # Display units and materials
-        if 'current_units' in st.session_state and st.session_state.current_units and st.session_state.get('current_course_id') == selected_course.id:
+        current_units = session_data.get("current_units")
+        if current_units and st.session_state.get('current_course_id') == selected_course.id:
             st.markdown("---")
             st.subheader("📑 Course Materials")
             
-            for unit in st.session_state.current_units:
-                with st.expander(f"📘 {unit.title}"):
+            for unit in current_units:
+                unit_node = snapshot["units"].get(unit.id, {"topics": {}})
+                new_badge = " 🆕" if is_new(unit_node, last_visit) else ""
+                with st.expander(f"📘 {unit.title}{new_badge}"):
                     if st.button(f"Load Topics for {unit.title}", key=f"load_topics_{unit.id}"):
                         with st.spinner(f"Loading topics for {unit.title}..."):
-                            topics, error = asyncio.run(fetch_topics(unit.id))
+                            topics, error = run_scoped("Courses", "course", selected_course.id, fetch_topics(unit.id))
                             
                             if error:
                                 st.error(f"Failed to fetch topics: {error}")
                             else:
-                                st.session_state[f"topics_{unit.id}"] = topics
+                                session_data.put(f"topics_{unit.id}", topics, group=selected_course.id)
                                 st.rerun()
                     
                     # Display topics if loaded
-                    if f"topics_{unit.id}" in st.session_state:
-                        topics = st.session_state[f"topics_{unit.id}"]
-                        
+                    topics = session_data.get(f"topics_{unit.id}")
+                    if topics is not None:
                         for topic in topics:
-                            st.markdown(f"**📝 {topic.title}**")
+                            topic_node = unit_node["topics"].get(topic.id, {"materials": {}})
+                            new_badge = " 🆕" if is_new(topic_node, last_visit) else ""
+                            st.markdown(f"**📝 {topic.title}**{new_badge}")
                             
                             # Material type selector
-                            material_types = {
-                                "Lecture Notes": "1",
-                                "Assignments": "2",
-                                "Question Papers": "3",
-                                "Lab Materials": "4",
-                                "Additional Resources": "5"
-                            }
+                            material_types = MATERIAL_TYPES
                             
                             cols = st.columns(len(material_types))
                             for idx, (mat_name, mat_id) in enumerate(material_types.items()):
                                 with cols[idx]:
                                     if st.button(mat_name, key=f"mat_{topic.id}_{mat_id}", use_container_width=True):
                                         with st.spinner(f"Fetching {mat_name}..."):
-                                            materials, error = asyncio.run(fetch_materials(topic, mat_id))
+                                            materials, error = run_scoped("Courses", "course", selected_course.id, fetch_materials(topic, mat_id))
                                             
                                             if error:
                                                 st.error(f"Error: {error}")
                                             elif not materials:
                                                 st.info(f"No {mat_name} available")
                                             else:
-                                                st.session_state[f"materials_{topic.id}_{mat_id}"] = materials
+                                                session_data.put(f"materials_{topic.id}_{mat_id}", materials, group=selected_course.id)
                                                 st.rerun()
                             
                             # Display materials if loaded
                             for mat_name, mat_id in material_types.items():
                                 mat_key = f"materials_{topic.id}_{mat_id}"
-                                if mat_key in st.session_state:
-                                    materials = st.session_state[mat_key]
-                                    if materials:
-                                        st.markdown(f"**{mat_name}:**")
-                                        for material in materials:
-                                            if material.is_pdf:
-                                                st.markdown(f"📄 [{material.title}]({material.url})")
-                                            else:
-                                                st.markdown(f"🔗 [{material.title}]({material.url})")
+                                materials = session_data.get(mat_key)
+                                if materials:
+                                    st.markdown(f"**{mat_name}:**")
+                                    seen = {item["url"]: item for item in topic_node["materials"].get(mat_id, {}).get("items", [])}
+                                    # Size and page count are probed in the background, once per list, then shown on later reruns
+                                    probed_lists = st.session_state.setdefault('probed_lists', set())
+                                    if mat_key not in probed_lists:
+                                        probed_lists.add(mat_key)
+                                        start_probe(username, password, [material.url for material in materials])
+                                    for material in materials:
+                                        new_badge = " 🆕" if is_new(seen.get(material.url), last_visit) else ""
+                                        info = describe(get_metadata(material.url))
+                                        if info:
+                                            info = f" `{info}`"
+                                        elif is_probing(material.url):
+                                            info = " *checking size...*"
+                                        if material.is_pdf:
+                                            st.markdown(f"📄 [{material.title}]({material.url}){info}{new_badge}")
+                                        else:
+                                            st.markdown(f"🔗 [{material.title}]({material.url}){info}{new_badge}")
                             
                             st.markdown("---")
 
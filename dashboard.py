@@ -1,8 +1,10 @@
 import streamlit as st
 import datetime as dt
-from session_utils import restore_session_from_cookie
-
-restore_session_from_cookie()
+from task_store import TaskStore
+from page_utils import parse_semester
+from timeline import (
+    get_timeline, get_timeline_error, clear_timeline_error, start_timeline_build, is_timeline_building
+)
 
 # Check if user is logged in
 if not st.session_state.get('logged_in', False):
@@ -41,48 +43,77 @@ with info_col3:
     st.info(f"**Section:** {section} • Sem {semester}")
 col1, col2 = st.columns(2)
 
-# Initialize session state for tasks
-if 'tasks' not in st.session_state:
-    st.session_state.tasks = []
-
-#tasks class
-class ToDoList:
-    def __init__(self, tasks_list):
-        self.tasks = tasks_list
-
-    def add_task(self, task):
-        self.tasks.append(task)
-
-    def remove_task(self, task):
-        if task in self.tasks:
-            self.tasks.remove(task)
-    
-    def finish_task(self, task):
-        if task in self.tasks:
-            self.tasks.remove(task)
-            st.success(f"✅'{task}' was completed!")
+# Open the task store once per login, keyed by the account (not the display name).
+# Tasks are read from it on every render, so other tabs' changes show up.
+pesu_username = st.session_state.pesu_username
+task_store = st.session_state.get('task_store')
+if task_store is None or task_store.username != pesu_username:
+    st.session_state.task_store = TaskStore.load(pesu_username)
 
-    def get_tasks(self):
-        return self.tasks
-
-todo_list = ToDoList(st.session_state.tasks)
+todo_list = st.session_state.task_store
 
 with col1:
     date_c = st.container(border=True,horizontal_alignment="center",vertical_alignment="center",horizontal=True)
     todays_date = dt.date.today().strftime("%d-%m-%Y")
     date_c.header(todays_date)
 
+    # Upcoming deadlines from the precomputed assignment timeline
+    deadline_c = st.container(border=True)
+    deadline_c.header("Upcoming Deadlines")
+    current_sem = parse_semester(semester)
+    username = st.session_state.get('pesu_username')
+    timeline = get_timeline(username, current_sem) if username else None
+    timeline_error = get_timeline_error(username, current_sem) if username and timeline is None else None
+    if timeline is not None:
+        upcoming = timeline.upcoming(days=14)
+        if upcoming:
+            for due, entry in upcoming:
+                deadline_c.markdown(f"**{due.strftime('%d-%m-%Y')}** · [{entry['title']}]({entry['url']}) — {entry['course']}")
+        else:
+            deadline_c.caption("No deadlines in the next two weeks")
+        if timeline.undated:
+            deadline_c.caption(f"{len(timeline.undated)} assignments without a listed due date")
+    elif timeline_error:
+        deadline_c.error(f"Could not collect assignments: {timeline_error}")
+        if deadline_c.button("Retry", key="retry_deadlines"):
+            clear_timeline_error(username, current_sem)
+            start_timeline_build(username, st.session_state.pesu_password, current_sem)
+            st.rerun()
+    elif username and st.session_state.get('pesu_password'):
+        # Build automatically once per browser session; later visits use the cached timeline
+        requested = st.session_state.setdefault('timeline_requested', set())
+        if is_timeline_building(username, current_sem):
+            deadline_c.caption("Collecting assignments from your courses...")
+            if deadline_c.button("Refresh", key="refresh_deadlines"):
+                st.rerun()
+        elif current_sem not in requested:
+            requested.add(current_sem)
+            start_timeline_build(username, st.session_state.pesu_password, current_sem)
+            deadline_c.caption("Collecting assignments from your courses...")
+        elif deadline_c.button("Collect Deadlines", key="build_deadlines"):
+            start_timeline_build(username, st.session_state.pesu_password, current_sem)
+            st.rerun()
+
+@st.fragment
+def render_tasks():
+    """Render the task list; checkbox clicks only rerun this fragment."""
+    for task in todo_list.get_tasks():
+        label = f"{task['title']} (due {task['due']})" if task['due'] else task['title']
+        if st.checkbox(label=label, key=f"task_{task['id']}"):
+            todo_list.finish_task(task['id'])
+            st.toast(f"✅'{task['title']}' was completed!")
+            st.rerun(scope="fragment")
+
 with col2:
     task_c = st.container(border=True)
     task_c.header("Tasks")
     new_task = task_c.text_input(label="Enter Tasks to complete")
+    due_date = task_c.date_input("Due date", value=None, format="DD-MM-YYYY")
     if task_c.button("Add Task"):
         if new_task:
-            todo_list.add_task(new_task)
+            todo_list.add_task(new_task, due=due_date)
             task_c.success("Task Added")
         else:
             task_c.error("Please enter task")
-    tasks = todo_list.get_tasks()
-    for task in tasks:
-        if task_c.checkbox(label=task):
-            todo_list.finish_task(task)
\ No newline at end of file
+    with task_c:
+        render_tasks()
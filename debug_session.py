@@ -5,8 +5,7 @@ import hashlib
 import platform
 import socket
 import os
-import json
-from datetime import datetime
+from session_registry import get_session_registry
 
 SESSION_DIR = ".sessions"
 
@@ -49,21 +48,15 @@ print()
 # Check session files
 print("=== Session Files ===")
 if os.path.exists(SESSION_DIR):
-    files = os.listdir(SESSION_DIR)
-    if files:
-        for f in files:
-            if f.startswith("session_"):
-                filepath = os.path.join(SESSION_DIR, f)
-                print(f"\nFile: {f}")
-                try:
-                    with open(filepath, 'r') as fh:
-                        data = json.load(fh)
-                    print(f"  Device ID in file: {data.get('device_id', 'NOT FOUND')}")
-                    print(f"  Username: {data.get('username', 'N/A')}")
-                    print(f"  Created: {data.get('created_at', 'N/A')}")
-                    print(f"  Last accessed: {data.get('last_accessed', 'N/A')}")
-                except Exception as e:
-                    print(f"  Error reading: {e}")
+    entries = get_session_registry().list_sessions(include_expired=True)
+    if entries:
+        for entry in entries:
+            print(f"\nFile: session_{entry['session_id']}.json")
+            print(f"  Device ID in file: {entry['session_id']}")
+            print(f"  Username: {entry['username'] or 'N/A'}")
+            print(f"  Created: {entry['created_at'] or 'N/A'}")
+            print(f"  Last accessed: {entry['last_accessed'] or 'N/A'}")
+            print(f"  Expires: {entry['expires_at']}")
     else:
         print("No session files found")
 else:
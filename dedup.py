@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Find exact and near-duplicate PDFs in the local files/ mirror.
+
+Every PDF gets an exact content hash, and every page a hash of its normalised
+text and a MinHash signature over its word shingles. LSH banding over the page
+signatures finds candidate page pairs, confirmed by estimated Jaccard
+similarity. A document is a near duplicate of another when most of its pages
+closely match pages of that one, so a question bank re-uploaded with a page
+added or a cover changed is still caught. Files are clustered in path order:
+the first file of each cluster is its canonical copy and every other member
+points at it. The index is saved to .cache/dedup_index.json and read by the
+Courses page.
+
+Pages are not stored twice by this tool itself: page_store records where each
+distinct page first appears, and --link replaces exact duplicate files with
+hard links. Near duplicates keep their own files.
+
+Usage: python dedup.py [--link]
+    --link  replace exact duplicate files with hard links to one copy
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+from pdf_text import file_hash, get_pdf_text_service
+
+FILES_DIR = "files"
+DEDUP_INDEX_FILE = os.path.join(".cache", "dedup_index.json")
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+# Estimated Jaccard similarity at which two pages count as the same page
+PAGE_SIMILARITY_THRESHOLD = 0.8
+# Share of a document's pages that must match another document's
+NEAR_DUPLICATE_SHARE = 0.8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME or 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_PERMUTATIONS)
+]
+
+
+def normalise_text(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def page_hash(text):
+    return hashlib.sha1(normalise_text(text).encode()).hexdigest()[:16]
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Return the set of hashed word shingles of a text."""
+    words = normalise_text(text).split()
+    if len(words) < size:
+        return {hash_shingle(" ".join(words))} if words else set()
+    return {hash_shingle(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def hash_shingle(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(shingle_hashes):
+    """MinHash signature of a set of shingle hashes (empty list for empty input)."""
+    if not shingle_hashes:
+        return []
+    return [
+        min((a * x + b) % _MERSENNE_PRIME for x in shingle_hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def list_pdfs(root=FILES_DIR):
+    pdfs = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(".pdf"):
+                pdfs.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(pdfs)
+
+
+def extract_all_pages(paths, root=FILES_DIR, timeout=600):
+    """Content hash and page texts of every PDF, through the shared extraction service."""
+    service = get_pdf_text_service()
+    keys = {path: service.submit(os.path.join(root, path)) for path in paths}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        statuses = [service.status(key) for key in keys.values()]
+        if all(s["finished"] or s["error"] for s in statuses):
+            break
+        time.sleep(0.2)
+    digests = {}
+    pages = {}
+    for path, key in keys.items():
+        status = service.status(key)
+        reader = service.reader(key)
+        # Unreadable files still get an exact hash, so they can match each other
+        digests[path] = status["digest"] or file_hash(os.path.join(root, path))
+        pages[path] = [reader.page_text(p) or "" for p in range(status["total"] or 0)] if reader else []
+    return digests, pages
+
+
+def build_index(root=FILES_DIR):
+    """Fingerprint every PDF under root and group exact and near duplicates."""
+    paths = list_pdfs(root)
+    digests, pages = extract_all_pages(paths, root)
+
+    files = {}
+    page_store = {}
+    page_signatures = {}
+    for path in paths:
+        page_hashes = [page_hash(text) for text in pages[path]]
+        files[path] = {
+            "sha256": digests[path],
+            "size": os.path.getsize(os.path.join(root, path)),
+            "pages": page_hashes,
+        }
+        for page_no, h in enumerate(page_hashes):
+            signature = minhash(shingles(pages[path][page_no]))
+            if not signature:
+                continue
+            page_signatures[(path, page_no)] = signature
+            # Each distinct page is recorded once, at its first location
+            page_store.setdefault(h, [path, page_no])
+
+    # Byte-identical copies share one set of page matches: their first copy's
+    first_copy = {}
+    for path in paths:
+        first_copy.setdefault(files[path]["sha256"], path)
+
+    # path -> other path -> pages of path with a close match in other
+    matches = defaultdict(lambda: defaultdict(set))
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = defaultdict(list)
+    for page, signature in page_signatures.items():
+        if first_copy[files[page[0]]["sha256"]] != page[0]:
+            continue
+        for band in range(LSH_BANDS):
+            buckets[(band, tuple(signature[band * rows:(band + 1) * rows]))].append(page)
+    compared = set()
+    for candidates in buckets.values():
+        for i, page_a in enumerate(candidates):
+            for page_b in candidates[i + 1:]:
+                if page_a[0] == page_b[0] or (page_a, page_b) in compared:
+                    continue
+                compared.add((page_a, page_b))
+                if similarity(page_signatures[page_a], page_signatures[page_b]) >= PAGE_SIMILARITY_THRESHOLD:
+                    matches[page_a[0]][page_b[0]].add(page_a[1])
+                    matches[page_b[0]][page_a[0]].add(page_b[1])
+
+    # Greedy clustering in path order: a file is a duplicate of an earlier
+    # canonical file or becomes canonical itself, so canonical files are
+    # never marked and duplicates never chain.
+    duplicates = {}
+    canonical = set()
+    for path in paths:
+        copy_of = first_copy[files[path]["sha256"]]
+        if copy_of != path:
+            # A copy of a duplicate points at the same canonical file
+            duplicates[path] = duplicates.get(copy_of) or {"of": copy_of, "kind": "exact", "similarity": 1.0}
+            continue
+        # Most matching pages wins, then the earliest path
+        candidates = [(-len(matched), other) for other, matched in matches[path].items() if other in canonical]
+        if candidates:
+            matched, original = min(candidates)
+            text_pages = sum((path, page_no) in page_signatures for page_no in range(len(files[path]["pages"])))
+            share = -matched / text_pages
+            if share >= NEAR_DUPLICATE_SHARE:
+                duplicates[path] = {"of": original, "kind": "near", "similarity": round(share, 2)}
+                continue
+        canonical.add(path)
+
+    for path, info in files.items():
+        info["shared_pages"] = sum(page_store.get(h, [path])[0] != path for h in info["pages"])
+
+    return {"built_at": time.time(), "files": files, "duplicates": duplicates, "page_store": page_store}
+
+
+def save_index(index, path=DEDUP_INDEX_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+
+def load_index(path=DEDUP_INDEX_FILE):
+    """Load the saved dedup index, or None if it has not been built."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def link_exact_duplicates(index, root=FILES_DIR):
+    """Replace exact duplicate files with hard links to their original; returns bytes saved."""
+    saved = 0
+    for path, info in index["duplicates"].items():
+        if info["kind"] != "exact":
+            continue
+        target = os.path.join(root, path)
+        original = os.path.join(root, info["of"])
+        if os.path.samefile(target, original):
+            continue
+        tmp_path = f"{target}.link"
+        os.link(original, tmp_path)
+        os.replace(tmp_path, target)
+        saved += index["files"][path]["size"]
+    return saved
+
+
+def describe_duplicate(path, original):
+    """Short label such as "same as Unit 2 QB" for a duplicate's original."""
+    path_parts = path.split(os.sep)
+    original_parts = original.split(os.sep)
+    name = os.path.splitext(original_parts[-1])[0]
+    if path_parts[0] == original_parts[0]:
+        return " ".join(original_parts[1:-1] + [name])
+    return " ".join(original_parts[:-1] + [name])
+
+
+if __name__ == "__main__":
+    index = build_index()
+    save_index(index)
+    print(f"Indexed {len(index['files'])} PDFs, {len(index['page_store'])} distinct pages")
+    for path, info in sorted(index["duplicates"].items()):
+        label = "same as" if info["kind"] == "exact" else f"{info['similarity']:.0%} of pages match"
+        print(f"  {path}: {label} {info['of']}")
+    if "--link" in sys.argv:
+        print(f"Saved {link_exact_duplicates(index) / 1024:.1f} KiB with hard links")
@@ -0,0 +1,114 @@
+"""Cancellable upstream fetches tied to a (session, page, widget) scope.
+
+Page fetches run on one shared background event loop instead of a fresh
+``asyncio.run`` in the script thread. Each fetch is registered under a scope
+with the widget value it was made for (e.g. the selected course). Starting a
+fetch for a new value cancels the outstanding fetches for the old one, and
+opening another page cancels everything the session left running elsewhere.
+The script thread waits in short steps and redraws a progress caption, which
+gives Streamlit the chance to stop a superseded run; the fetch is cancelled
+when that happens. Every fetch also has a deadline.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+FETCH_TIMEOUT = 30.0
+POLL_INTERVAL = 0.25
+
+_loop = None
+_loop_lock = threading.Lock()
+_scopes = {}
+_scopes_lock = threading.Lock()
+
+
+def get_loop():
+    """Get the shared background event loop, starting its thread on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="fetch-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def get_fetch_session_id():
+    """Stable ID for the current browser session."""
+    if "fetch_session_id" not in st.session_state:
+        st.session_state.fetch_session_id = uuid.uuid4().hex
+    return st.session_state.fetch_session_id
+
+
+def _cancel(futures):
+    for future in futures:
+        future.cancel()
+
+
+def submit(scope, value, coro, timeout=FETCH_TIMEOUT):
+    """Schedule coro under scope; fetches for a different value in the same scope are cancelled."""
+    future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(coro, timeout), get_loop())
+    with _scopes_lock:
+        current_value, futures = _scopes.get(scope, (value, []))
+        if current_value != value:
+            _cancel(futures)
+            futures = []
+        futures = [f for f in futures if not f.done()] + [future]
+        _scopes[scope] = (value, futures)
+    return future
+
+
+def _release(scope, future):
+    """Forget a finished fetch so its result is not kept alive; drop empty scopes."""
+    with _scopes_lock:
+        entry = _scopes.get(scope)
+        if entry is None:
+            return
+        value, futures = entry
+        futures = [f for f in futures if f is not future]
+        if futures:
+            _scopes[scope] = (value, futures)
+        else:
+            del _scopes[scope]
+
+
+def cancel_scopes(predicate):
+    """Cancel every outstanding fetch whose scope matches predicate."""
+    with _scopes_lock:
+        for scope in [scope for scope in _scopes if predicate(scope)]:
+            _cancel(_scopes.pop(scope)[1])
+
+
+def cancel_other_pages(page):
+    """Cancel this session's fetches that belong to any page other than page."""
+    session_id = get_fetch_session_id()
+    cancel_scopes(lambda scope: scope[0] == session_id and scope[1] != page)
+
+
+def run_scoped(page, widget, value, coro, timeout=FETCH_TIMEOUT):
+    """Run a page fetch returning (result, error) while keeping the script run interruptible."""
+    scope = (get_fetch_session_id(), page, widget)
+    future = submit(scope, value, coro, timeout)
+    progress = st.empty()
+    started = time.monotonic()
+    try:
+        while True:
+            done, _ = concurrent.futures.wait([future], timeout=POLL_INTERVAL)
+            if done:
+                return future.result()
+            # Redrawing lets Streamlit stop this run if the user has moved on
+            progress.caption(f"Waiting for PESU Academy... {time.monotonic() - started:.1f}s")
+    except (asyncio.TimeoutError, TimeoutError):
+        return None, "PESU Academy took too long to respond. Please try again."
+    except concurrent.futures.CancelledError:
+        return None, "Request was cancelled."
+    finally:
+        future.cancel()
+        _release(scope, future)
+        progress.empty()
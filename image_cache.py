@@ -0,0 +1,186 @@
+"""Decode-once cache for profile photos, keyed by content hash.
+
+The base64 photo from the profile is decoded a single time, downscaled to the
+sizes the pages display and written to .cache/images/. Pages (and the session
+cookie) only carry the key, so the files must outlive the process. A bounded
+in-memory LRU keeps the hot ones. On disk, files unused for longer than a
+session cookie lives are removed, then the least recently used ones while the
+directory is over MAX_DISK_BYTES; a pruned photo is stored again at the next
+login.
+"""
+
+import base64
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+
+# Display sizes (longest edge, in pixels)
+IMAGE_SIZES = {
+    "avatar": 96,
+    "panel": 320,
+}
+IMAGE_DIR = os.path.join(".cache", "images")
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+MAX_DISK_BYTES = 256 * 1024 * 1024
+# Matches the session cookie's lifetime (see session_utils.COOKIE_MAX_AGE)
+MAX_DISK_AGE = 30 * 24 * 60 * 60
+
+
+class ImageCache:
+    """LRU cache of image bytes bounded by total size."""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is not None:
+                self._data.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_images = ImageCache()
+
+
+def resize_image(image_bytes, max_edge):
+    """Downscale image bytes so the longest edge is at most max_edge."""
+    try:
+        from PIL import Image
+
+        with Image.open(BytesIO(image_bytes)) as image:
+            image.thumbnail((max_edge, max_edge))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = BytesIO()
+            image.save(output, format="JPEG", quality=85, optimize=True)
+            return output.getvalue()
+    except Exception:
+        return image_bytes
+
+
+def get_image_file(key, size):
+    return os.path.join(IMAGE_DIR, f"{key}_{size}.jpg")
+
+
+def _write_image(path, data):
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _touch(path):
+    """Mark a stored image as used; the modification time is its last use."""
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def prune_images(max_bytes=MAX_DISK_BYTES, max_age=MAX_DISK_AGE):
+    """Remove stored images unused for max_age, then the oldest while over max_bytes."""
+    try:
+        names = os.listdir(IMAGE_DIR)
+    except OSError:
+        return
+    files = []
+    for name in names:
+        # Leave files being written alone
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(IMAGE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    cutoff = time.time() - max_age
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def register_image(image_b64):
+    """Decode and resize a base64 image once; return its content key or None."""
+    if not image_b64:
+        return None
+    key = hashlib.sha256(image_b64.encode()).hexdigest()[:16]
+    if all(_touch(get_image_file(key, size)) for size in IMAGE_SIZES):
+        return key
+    try:
+        image_bytes = base64.b64decode(image_b64)
+    except Exception:
+        return None
+    for size, max_edge in IMAGE_SIZES.items():
+        data = resize_image(image_bytes, max_edge)
+        _write_image(get_image_file(key, size), data)
+        _images.set(f"{key}:{size}", data)
+    prune_images()
+    return key
+
+
+def get_image(key, size="panel"):
+    """Return the image bytes for a key at a display size, or None if unknown."""
+    if not key:
+        return None
+    data = _images.get(f"{key}:{size}")
+    if data is None:
+        path = get_image_file(key, size)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        _touch(path)
+        _images.set(f"{key}:{size}", data)
+    return data
+
+
+def strip_profile_image(profile):
+    """Move the base64 photo out of a profile (dict or model); return its key."""
+    if profile is None:
+        return None
+    personal = profile.get('personal') if isinstance(profile, dict) else getattr(profile, 'personal', None)
+    if personal is None:
+        return None
+    image_b64 = personal.get('image') if isinstance(personal, dict) else getattr(personal, 'image', None)
+    if not image_b64:
+        return None
+    key = register_image(image_b64)
+    if key is None:
+        return None
+    if isinstance(personal, dict):
+        personal['image'] = None
+    else:
+        personal.image = None
+    return key
@@ -1,51 +1,33 @@
 import streamlit as st
 import asyncio
-import json
-from pesuacademy import PESUAcademy
-from session_utils import get_cookie_manager, restore_session_from_cookie
+from pesu_client import login_pesu, clear_upstream_session
+from scheduler import get_scheduler
+from session_utils import set_session_cookie, delete_session_cookie
+from image_cache import strip_profile_image
+from page_utils import encode_session_cookie, decode_session_cookie
 
-def save_session_cookie(username, password, profile):
-    """Save session to browser cookie"""
-    cookie_manager = get_cookie_manager()
-    
-    # Convert profile to dict
-    if hasattr(profile, 'model_dump'):
-        profile_dict = profile.model_dump()
-    elif hasattr(profile, 'dict'):
-        profile_dict = profile.dict()
-    elif isinstance(profile, dict):
-        profile_dict = profile
-    else:
-        profile_dict = profile.__dict__ if hasattr(profile, '__dict__') else {}
-    
-    session_data = {
-        'username': username,
-        'password': password,
-        'profile': profile_dict
-    }
-    
-    # Save to browser cookie (expires in 30 days)
-    cookie_manager.set('pesu_session', json.dumps(session_data), max_age=30*24*60*60)
+def save_session_cookie(username, password, profile, image_key=None):
+    """Save session to browser cookie (sent with the next cookie flush, expires in 30 days)"""
+    cookie_value = encode_session_cookie(username, password, profile, image_key)
+    set_session_cookie(cookie_value, decode_session_cookie(cookie_value))
 
 def clear_session_cookie():
     """Clear session cookie"""
-    cookie_manager = get_cookie_manager()
-    cookie_manager.delete('pesu_session')
+    delete_session_cookie()
 
 async def login_user(username, password):
     """Async function to login to PESU Academy"""
     try:
-        pesu = await PESUAcademy.login(username, password)
-        profile = await pesu.get_profile()
-        await pesu.close()
+        async with get_scheduler().slot(username):
+            pesu = await login_pesu(username, password)
+            profile = await pesu.get_profile()
+            await pesu.close()
         return profile, None
     except Exception as e:
         return None, str(e)
 
 def main():
     st.title("🔐 Login to PESU Academy")
-    
-    restore_session_from_cookie()
 
     # Check if user is already logged in
     if 'logged_in' in st.session_state and st.session_state.logged_in:
@@ -77,10 +59,13 @@ def main():
         
         # Logout button
         if st.button("Logout", type="secondary"):
+            clear_upstream_session(st.session_state.get('pesu_username'))
             st.session_state.logged_in = False
             st.session_state.profile = None
             st.session_state.pesu_username = None
             st.session_state.pesu_password = None
+            st.session_state.profile_image_key = None
+            st.session_state.pop('task_store', None)
             clear_session_cookie()
             st.success("Logged out successfully!")
             st.rerun()
@@ -104,13 +89,16 @@ def main():
                         if error:
                             st.error(f"Login failed: {error}")
                         else:
+                            # Decode the photo once; pages reference it by key
+                            image_key = strip_profile_image(profile)
                             st.session_state.logged_in = True
                             st.session_state.profile = profile
+                            st.session_state.profile_image_key = image_key
                             st.session_state.pesu_username = username
                             st.session_state.pesu_password = password
                             
                             # Save session to browser cookie
-                            save_session_cookie(username, password, profile)
+                            save_session_cookie(username, password, profile, image_key)
                             
                             st.success("Login successful!",icon=":material/check:")
                             st.rerun()
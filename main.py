@@ -1,5 +1,8 @@
 import streamlit as st
-from session_utils import restore_session_from_cookie
+from session_utils import bootstrap_session, flush_cookie_updates
+from image_cache import get_image
+from fetch_scope import cancel_other_pages
+from session_registry import start_sweeper
 
 st.set_page_config(page_title="Better PESU", page_icon=":books:", layout="wide")
 
@@ -9,8 +12,11 @@ if 'logged_in' not in st.session_state:
 if 'profile' not in st.session_state:
     st.session_state.profile = None
 
-# Try to restore session from browser cookies
-restore_session_from_cookie()
+# Clean up expired session files in the background
+start_sweeper()
+
+# Restore the login from the browser cookie (read once per browser session)
+bootstrap_session()
 
 logo_svg = """
 <svg width="300" height="50">
@@ -41,6 +47,9 @@ if st.session_state.logged_in and st.session_state.profile:
             name = st.session_state.profile.personal.name if hasattr(st.session_state.profile, 'personal') else 'User'
             section = st.session_state.profile.personal.section if hasattr(st.session_state.profile, 'personal') else 'N/A'
             semester = st.session_state.profile.personal.semester if hasattr(st.session_state.profile, 'personal') else 'N/A'
+        avatar = get_image(st.session_state.get('profile_image_key'), "avatar")
+        if avatar:
+            st.image(avatar, width=48)
         st.caption(f"**{name}**")
         st.caption(f"{section} • Sem {semester}")
 
@@ -52,4 +61,10 @@ pg = st.navigation([page for page in [
     st.Page("settings.py",title="Settings",icon=":material/settings:")
 ] if page is not None])
 
-pg.run()
\ No newline at end of file
+# Stop fetches this session left running on other pages
+cancel_other_pages(pg.title)
+
+pg.run()
+
+# Send cookie changes the page queued during this run
+flush_cookie_updates()
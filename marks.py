@@ -1,10 +1,12 @@
 import streamlit as st
-import asyncio
 import pandas as pd
-from pesuacademy import PESUAcademy
-from session_utils import restore_session_from_cookie
-
-restore_session_from_cookie()
+from pesu_client import run_pesu
+from scheduler import SchedulerBusy
+from fetch_scope import run_scoped
+from session_data import get_session_data
+from cache_backend import get_cache, cache_key, RESULTS_TTL
+from page_utils import parse_semester, profile_field, summarize_course
+from what_if import get_simulation
 
 # Check if user is logged in
 if not st.session_state.get('logged_in', False):
@@ -14,22 +16,13 @@ if not st.session_state.get('logged_in', False):
 
 st.title("📊 Grades & Results")
 
-# Get profile to determine current semester
-profile = st.session_state.profile
-if isinstance(profile, dict):
-    personal = profile.get('personal', {})
-    sem_str = personal.get('semester', '1') if isinstance(personal, dict) else personal.get('semester', '1')
-else:
-    sem_str = profile.personal.semester
+# Fetches run on a background loop, so read credentials here rather than in them
+username = st.session_state.get('pesu_username')
+password = st.session_state.get('pesu_password')
+session_data = get_session_data()
 
-# Parse semester - handle both "Sem-2" and "2" formats
-try:
-    if isinstance(sem_str, str):
-        current_sem = int(sem_str.split('-')[-1]) if '-' in sem_str else int(sem_str)
-    else:
-        current_sem = int(sem_str)
-except:
-    current_sem = 1
+# Get profile to determine current semester ("Sem-2" and "2" formats)
+current_sem = parse_semester(profile_field(st.session_state.profile, 'semester', '1'))
 
 # Semester selector
 st.subheader("Select Semester")
@@ -44,32 +37,33 @@ async def fetch_results(semester):
     """Fetch results from PESU Academy API"""
     try:
         # Check if credentials are available
-        if not st.session_state.get('pesu_username') or not st.session_state.get('pesu_password'):
+        if not username or not password:
             return None, "Credentials not found. Please login again."
         
-        # Create a new authenticated session
-        pesu = await PESUAcademy.login(
-            st.session_state.pesu_username,
-            st.session_state.pesu_password
-        )
-        
-        if not pesu:
-            return None, "Login failed. Please try again."
+        cache = get_cache()
+        key = cache_key("results", username, semester)
+        results = cache.get(key)
+        if results is not None:
+            return results, None
         
+        # Reuse the stored upstream session when there is one
         try:
-            results = await pesu.get_results(semester)
+            results = await run_pesu(
+                username,
+                password,
+                lambda pesu: pesu.get_results(semester)
+            )
+        except SchedulerBusy as busy:
+            return None, str(busy)
         except AttributeError as ae:
-            await pesu.close()
             return None, f"Results page structure not found. This might mean:\n- No results available for semester {semester} yet\n- Results are still being processed\n- Please try again later or contact support"
         except Exception as parse_error:
-            await pesu.close()
             return None, f"Error parsing results: {str(parse_error)}"
         
-        await pesu.close()
-        
         if not results:
             return None, "No results found for this semester."
         
+        cache.set(key, results, ttl=RESULTS_TTL)
         return results, None
     except Exception as e:
         import traceback
@@ -80,22 +74,22 @@ async def fetch_results(semester):
 # Fetch button or auto-fetch
 if st.button("Fetch Results", type="primary", use_container_width=True,icon=":material/azm:"):
     with st.spinner(f"Fetching semester {selected_sem} results..."):
-        results, error = asyncio.run(fetch_results(selected_sem))
+        results, error = run_scoped("Grades", "semester", selected_sem, fetch_results(selected_sem))
         
         if error:
             st.error(error)
             st.warning("Tips:\n- Make sure results are published as **Final** (not just provisional)\n- Try a different semester\n- Results might still be processing",icon=":material/lightbulb_2:")
         else:
-            st.session_state.results = results
+            session_data.put("results", results, group="results")
             st.success("Results fetched successfully!")
 else:
     st.caption("Note: The library currently supports final published results. If you see provisional results on PESU Academy, they may not be available through this API yet.")
 
 # Display results if available
-if 'results' in st.session_state and st.session_state.results:
-    results = st.session_state.results
+results = session_data.get("results")
+if results:
     
-    # Display SGPA
+    # Header first, so it is on screen before the per-course work starts
     st.markdown("---")
     sgpa_col1, sgpa_col2, sgpa_col3 = st.columns(3)
     with sgpa_col1:
@@ -105,84 +99,73 @@ if 'results' in st.session_state and st.session_state.results:
     with sgpa_col3:
         st.metric("📝 Courses", len(results.courses))
     
-    # Display courses table
+    # Lay out the table and one tab per course up front, then fill them in
     st.markdown("---")
     st.subheader(f"Semester {selected_sem} Courses")
+    table_slot = st.empty()
     
-    courses_data = []
-    for course in results.courses:
-        # Calculate total marks and percentage
-        total_marks = 0
-        total_possible = 0
-        
-        for assessment in course.assessments:
-            marks = int(assessment.marks) if isinstance(assessment.marks, (int, float, str)) else 0
-            total = int(assessment.total) if isinstance(assessment.total, (int, float, str)) else 0
-            total_marks += marks
-            total_possible += total
-        
-        percentage = (total_marks / total_possible * 100) if total_possible > 0 else 0
-        
-        # Determine grade based on percentage (typical grading scale)
-        if percentage >= 90:
-            grade = "A+"
-        elif percentage >= 80:
-            grade = "A"
-        elif percentage >= 70:
-            grade = "B+"
-        elif percentage >= 60:
-            grade = "B"
-        elif percentage >= 50:
-            grade = "C"
-        else:
-            grade = "F"
-        
-        courses_data.append({
-            "Course Code": course.code,
-            "Course Title": course.title,
-            "Credits": course.credits,
-            "Total Marks": f"{total_marks}/{total_possible}",
-            "Percentage": f"{percentage:.1f}%",
-            "Grade": grade
-        })
-    
-    # Display courses as dataframe
-    courses_df = pd.DataFrame(courses_data)
-    st.dataframe(
-        courses_df,
-        use_container_width=True,
-        hide_index=True
-    )
-    
-    # Display detailed assessments
     st.markdown("---")
     st.subheader("Assessment Details")
     
-    # Create tabs for each course
-    if courses_data:
-        tabs = st.tabs([f"{course['Course Code']}" for course in courses_data])
-        
-        for idx, (tab, course) in enumerate(zip(tabs, results.courses)):
+    if results.courses:
+        tabs = st.tabs([course.code for course in results.courses])
+        tab_slots = []
+        for tab, course in zip(tabs, results.courses):
             with tab:
                 st.markdown(f"**{course.title}**")
-                
-                assessment_data = []
-                for assessment in course.assessments:
-                    marks = int(assessment.marks) if isinstance(assessment.marks, (int, float, str)) else 0
-                    total = int(assessment.total) if isinstance(assessment.total, (int, float, str)) else 0
-                    percentage = f"{(marks/total*100):.1f}%" if total > 0 else "N/A"
-                    assessment_data.append({
-                        "Assessment": assessment.name,
-                        "Marks Obtained": marks,
-                        "Total Marks": total,
-                        "Percentage": percentage
-                    })
-                
-                assessment_df = pd.DataFrame(assessment_data)
-                st.dataframe(
-                    assessment_df,
-                    use_container_width=True,
-                    hide_index=True
-                )
+                slot = st.empty()
+                slot.caption("Loading assessments...")
+                tab_slots.append(slot)
+        
+        # Tabs fill in course by course; the table is drawn once, from all rows
+        courses_data = []
+        for slot, course in zip(tab_slots, results.courses):
+            row, assessment_data = summarize_course(course)
+            courses_data.append(row)
+            slot.dataframe(
+                pd.DataFrame(assessment_data),
+                use_container_width=True,
+                hide_index=True
+            )
+        table_slot.dataframe(
+            pd.DataFrame(courses_data),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # What-if: marks needed in assessments that have no marks yet
+    st.markdown("---")
+    st.subheader("🎯 What-If Simulator")
+    simulation = get_simulation(username, selected_sem, results)
+    if not any(simulation["remaining"]):
+        st.caption("Every assessment already has marks, so there is nothing left to simulate.")
+    else:
+        st.caption("Marks needed in the remaining assessments for each grade (— means out of reach)")
+        band_rows = []
+        for i, code in enumerate(simulation["courses"]):
+            row = {"Course Code": code, "Remaining": simulation["remaining"][i]}
+            for grade, needed in simulation["bands"].items():
+                row[grade] = "—" if needed[i] is None else needed[i]
+            band_rows.append(row)
+        st.dataframe(pd.DataFrame(band_rows), use_container_width=True, hide_index=True)
+        
+        target = st.select_slider(
+            "Target SGPA",
+            options=[float(t) for t in simulation["plans"]],
+            key="what_if_target"
+        )
+        plan = simulation["plans"][str(target)]
+        if plan is None:
+            st.warning(f"An SGPA of {target} is out of reach with the remaining assessments.")
+        else:
+            st.dataframe(
+                pd.DataFrame([
+                    {"Course Code": code, "Target Grade": step["grade"], "Marks Needed": step["needed"]}
+                    for code, step in zip(simulation["courses"], plan)
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(f"Least total marks found for SGPA {target}: {sum(step['needed'] for step in plan):.1f}")
 else:
     st.info(f"👆 Click the 'Fetch Results' button above to view semester {selected_sem} grades and marks.")
@@ -0,0 +1,190 @@
+"""Size, page count and type of materials, found without downloading them.
+
+Each material URL is probed with a ranged GET for its first bytes, which
+returns the total length and content type in the headers. A PDF's page count
+comes from the linearization dictionary in the head when there is one. If
+not, a second ranged GET reads the file's tail and takes the page tree's
+/Count. Files already in the local files/ mirror are read from disk instead,
+memoized per (path, size, mtime). Metadata of PDFs is cached per URL, so each
+material is probed once. Failed probes and non-PDF answers (such as the login
+page of an expired session) are not metadata: they are only remembered for a
+while so they are not retried on every rerun.
+"""
+
+import asyncio
+import functools
+import os
+import re
+import threading
+
+from cache_backend import get_cache, cache_key, CATALOG_TTL, RESULTS_TTL
+from pesu_client import run_pesu
+from scheduler import PREFETCH, REQUESTS_PER_SLOT
+
+PROBE_BYTES = 64 * 1024
+PROBE_CONCURRENCY = REQUESTS_PER_SLOT
+LARGE_MATERIAL_BYTES = 20 * 1024 * 1024
+LOCAL_PROBE_CACHE_SIZE = 1024
+
+_LINEARIZED_PAGES = re.compile(rb"/Linearized.{0,200}?/N\s+(\d+)", re.S)
+_PAGE_TREE_COUNT = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b", re.S)
+_CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)\s*$")
+
+
+def _pdf_page_count(head, tail=b""):
+    """Page count from raw PDF bytes, or None if it is not in them."""
+    match = _LINEARIZED_PAGES.search(head)
+    if match:
+        return int(match.group(1))
+    # The root of the page tree has the largest count
+    counts = [int(a or b) for a, b in _PAGE_TREE_COUNT.findall(tail + head)]
+    return max(counts) if counts else None
+
+
+def get_metadata(url):
+    """Cached metadata for a material URL, or None if it has not been probed."""
+    return get_cache().get(cache_key("material_meta", url))
+
+
+def probe_failed(url):
+    """Whether a recent probe of url failed or did not return a PDF."""
+    return get_cache().get(cache_key("material_probe_failed", url)) is not None
+
+
+def is_large(metadata):
+    return bool(metadata and (metadata.get("size") or 0) > LARGE_MATERIAL_BYTES)
+
+
+def describe(metadata):
+    """Short label such as "PDF · 12 pages · 3.4 MB" ("" when unknown)."""
+    if not metadata:
+        return ""
+    parts = []
+    mime = metadata.get("mime") or ""
+    if mime:
+        parts.append("PDF" if mime == "application/pdf" else mime.split("/")[-1].upper())
+    if metadata.get("pages"):
+        parts.append(f"{metadata['pages']} page{'s' if metadata['pages'] != 1 else ''}")
+    if metadata.get("size"):
+        size = metadata["size"]
+        parts.append(f"{size / 1024 / 1024:.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB")
+    return " · ".join(parts)
+
+
+def probe_local(path):
+    """Metadata of a file in the local mirror, read again only when the file changes."""
+    stat = os.stat(path)
+    return _probe_local(path, stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=LOCAL_PROBE_CACHE_SIZE)
+def _probe_local(path, size, mtime_ns):
+    with open(path, 'rb') as f:
+        head = f.read(PROBE_BYTES)
+        f.seek(max(0, size - PROBE_BYTES))
+        tail = f.read()
+    is_pdf = head.startswith(b"%PDF")
+    return {
+        "size": size,
+        "mime": "application/pdf" if is_pdf else None,
+        "pages": _pdf_page_count(head, tail) if is_pdf else None,
+    }
+
+
+async def _ranged_get(session, url, byte_range):
+    """Read at most PROBE_BYTES of a URL; returns (headers, status, bytes)."""
+    async with session.stream("GET", url, headers={"Range": f"bytes={byte_range}"}) as response:
+        data = b""
+        async for chunk in response.aiter_bytes():
+            data += chunk
+            if len(data) >= PROBE_BYTES:
+                break
+        return response.headers, response.status_code, data[:PROBE_BYTES]
+
+
+async def probe_url(session, url):
+    """Probe one URL with an authenticated httpx session."""
+    headers, status, head = await _ranged_get(session, url, f"0-{PROBE_BYTES - 1}")
+    size = None
+    if status == 206:
+        match = _CONTENT_RANGE_TOTAL.search(headers.get("content-range", ""))
+        size = int(match.group(1)) if match else None
+    elif headers.get("content-length"):
+        size = int(headers["content-length"])
+    mime = headers.get("content-type", "").split(";")[0].strip() or None
+    if head.startswith(b"%PDF"):
+        mime = "application/pdf"
+
+    pages = None
+    if mime == "application/pdf":
+        pages = _pdf_page_count(head)
+        if pages is None and status == 206 and size and size > PROBE_BYTES:
+            _, _, tail = await _ranged_get(session, url, f"-{PROBE_BYTES}")
+            pages = _pdf_page_count(head, tail)
+    return {"size": size, "mime": mime, "pages": pages}
+
+
+async def probe_urls(pesu, urls, concurrency=PROBE_CONCURRENCY):
+    """Probe every URL not cached yet, a few at a time.
+
+    Returns url -> metadata for every URL with known metadata, cached or new.
+    """
+    cache = get_cache()
+    session = pesu._client._session
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(url):
+        async with semaphore:
+            try:
+                metadata = await probe_url(session, url)
+            except Exception:
+                metadata = None
+        if metadata is None or metadata["mime"] != "application/pdf":
+            # Remember the failure for a while instead of retrying on every rerun
+            cache.set(cache_key("material_probe_failed", url), True, ttl=RESULTS_TTL)
+            return None
+        cache.set(cache_key("material_meta", url), metadata, ttl=CATALOG_TTL)
+        return metadata
+
+    known = {url: get_metadata(url) for url in dict.fromkeys(urls)}
+    pending = [url for url, metadata in known.items() if metadata is None and not probe_failed(url)]
+    results = await asyncio.gather(*(probe(url) for url in pending), return_exceptions=True)
+    known.update(zip(pending, results))
+    return {url: metadata for url, metadata in known.items() if metadata is not None and not isinstance(metadata, Exception)}
+
+
+_probes = {}
+_probes_lock = threading.Lock()
+
+
+def start_probe(username, password, urls):
+    """Probe URLs in a background thread; returns False if nothing needed probing."""
+    with _probes_lock:
+        urls = [
+            url for url in dict.fromkeys(urls)
+            if url not in _probes and get_metadata(url) is None and not probe_failed(url)
+        ]
+        if not urls:
+            return False
+
+        def run():
+            try:
+                asyncio.run(run_pesu(username, password, lambda pesu: probe_urls(pesu, urls), priority=PREFETCH))
+            except Exception:
+                pass
+            finally:
+                with _probes_lock:
+                    for url in urls:
+                        _probes.pop(url, None)
+
+        thread = threading.Thread(target=run, name="material-probe", daemon=True)
+        for url in urls:
+            _probes[url] = thread
+        thread.start()
+    return True
+
+
+def is_probing(url):
+    with _probes_lock:
+        thread = _probes.get(url)
+        return thread is not None and thread.is_alive()
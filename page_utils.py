@@ -0,0 +1,113 @@
+"""Pure data helpers shared by the pages (no Streamlit imports).
+
+Kept separate so they can be reused by the CLI tools and benchmarked offline
+(see benchmarks/transforms.py).
+"""
+
+import json
+
+GRADE_BOUNDARIES = ((90, "A+"), (80, "A"), (70, "B+"), (60, "B"), (50, "C"))
+
+
+def parse_semester(value, default=1):
+    """Semester number from values such as "Sem-2", "2" or 2."""
+    try:
+        if isinstance(value, str):
+            return int(value.split('-')[-1]) if '-' in value else int(value)
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def profile_field(profile, field, default=None):
+    """Read a personal-details field from a Profile model or its dict form."""
+    if isinstance(profile, dict):
+        personal = profile.get('personal') or {}
+    else:
+        personal = getattr(profile, 'personal', None)
+    if isinstance(personal, dict):
+        return personal.get(field, default)
+    return getattr(personal, field, default)
+
+
+def profile_to_dict(profile):
+    """Plain dict form of a profile, for JSON."""
+    if hasattr(profile, 'model_dump'):
+        return profile.model_dump()
+    if hasattr(profile, 'dict'):
+        return profile.dict()
+    if isinstance(profile, dict):
+        return profile
+    return profile.__dict__ if hasattr(profile, '__dict__') else {}
+
+
+def encode_session_cookie(username, password, profile, image_key=None):
+    return json.dumps({
+        'username': username,
+        'password': password,
+        'profile': profile_to_dict(profile),
+        'image_key': image_key
+    })
+
+
+def decode_session_cookie(value):
+    """Session dict from a cookie value; accepts an already decoded dict."""
+    return value if isinstance(value, dict) else json.loads(value)
+
+
+def parse_mark(value):
+    """Marks as a number, or None for values not reported yet ("-", "NA", blank)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_mark(value):
+    """Whole marks without a trailing .0; "—" for unreported ones."""
+    if value is None:
+        return "—"
+    return int(value) if float(value).is_integer() else round(value, 1)
+
+
+def grade_for(percentage):
+    for boundary, grade in GRADE_BOUNDARIES:
+        if percentage >= boundary:
+            return grade
+    return "F"
+
+
+def summarize_course(course):
+    """Compute the summary row and assessment rows for one course."""
+    total_marks = 0
+    total_possible = 0
+    assessment_data = []
+    for assessment in course.assessments:
+        marks = parse_mark(assessment.marks)
+        total = parse_mark(assessment.total) or 0
+        # Unreported assessments are listed but left out of the totals
+        if marks is not None:
+            total_marks += marks
+            total_possible += total
+        assessment_data.append({
+            "Assessment": assessment.name,
+            "Marks Obtained": format_mark(marks),
+            "Total Marks": format_mark(total),
+            "Percentage": f"{(marks/total*100):.1f}%" if marks is not None and total > 0 else "N/A"
+        })
+
+    percentage = (total_marks / total_possible * 100) if total_possible > 0 else 0
+    row = {
+        "Course Code": course.code,
+        "Course Title": course.title,
+        "Credits": course.credits,
+        "Total Marks": f"{format_mark(total_marks)}/{format_mark(total_possible)}",
+        "Percentage": f"{percentage:.1f}%",
+        "Grade": grade_for(percentage)
+    }
+    return row, assessment_data
+
+
+def course_options(courses):
+    """Selectbox label -> course."""
+    return {f"{course.code} - {course.title}": course for course in courses}
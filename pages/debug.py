@@ -1,6 +1,9 @@
 import streamlit as st
-import json
 import os
+from scheduler import get_scheduler
+from session_data import memory_report
+from session_registry import get_session_registry
+from session_utils import bootstrap_report
 
 st.title("Session Debug Info")
 
@@ -30,21 +33,14 @@ device_key_file = os.path.join(SESSION_DIR, ".device_key")
 st.write(f"**Device Key File:** `{device_key_file}`")
 st.write(f"**Exists:** {os.path.exists(device_key_file)}")
 
-# Show session files
+# Show session files from the registry index
 st.write("**Session Files:**")
 if os.path.exists(SESSION_DIR):
-    files = os.listdir(SESSION_DIR)
-    for f in files:
-        if f.startswith("session_"):
-            filepath = os.path.join(SESSION_DIR, f)
-            st.write(f"- `{f}`")
-            try:
-                with open(filepath, 'r') as fh:
-                    data = json.load(fh)
-                st.write(f"  - Username: `{data.get('username')}`")
-                st.write(f"  - Device ID: `{data.get('device_id')}`")
-            except Exception as e:
-                st.write(f"  - Error: {e}")
+    for entry in get_session_registry().list_sessions(include_expired=True):
+        st.write(f"- `session_{entry['session_id']}.json`")
+        st.write(f"  - Username: `{entry['username']}`")
+        st.write(f"  - Device ID: `{entry['session_id']}`")
+        st.write(f"  - Expires: `{entry['expires_at']}`")
 else:
     st.write("No session directory")
 
@@ -54,10 +50,19 @@ st.write(f"- logged_in: {st.session_state.get('logged_in', False)}")
 st.write(f"- profile: {bool(st.session_state.get('profile'))}")
 st.write(f"- pesu_username: {st.session_state.get('pesu_username', 'None')}")
 
+# Show how this browser session was restored from its cookie
+st.write("**Session Bootstrap:**")
+st.json(bootstrap_report())
+
+# Show session data memory use for this process
+st.write("**Session Memory:**")
+st.json(memory_report())
+
+# Show upstream scheduler state
+st.write("**Upstream Scheduler:**")
+st.json(get_scheduler().snapshot())
+
 if st.button("Clear All Sessions"):
-    import shutil
-    if os.path.exists(SESSION_DIR):
-        shutil.rmtree(SESSION_DIR)
-        os.makedirs(SESSION_DIR)
-        st.success("Sessions cleared!")
-        st.rerun()
+    get_session_registry().clear_sessions()
+    st.success("Sessions cleared!")
+    st.rerun()
@@ -0,0 +1,282 @@
+"""Background PDF text extraction with a per-page on-disk cache.
+
+Extraction runs in a process pool so large PDFs never block the Streamlit
+script thread: even hashing the file and counting its pages happen in a
+worker, and submitting only stats the file. The pool uses the spawn start
+method, since forking the multithreaded server is unsafe. Extracted pages are
+stored per content hash, so copies of a file share them. Each chunk of pages
+is written as two files: the UTF-8 text of every page back to back, and a
+JSON index with per-page byte offsets and layout blocks. Readers memory-map
+the text file and slice out the page they need.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_TEXT_DIR = os.path.join(".cache", "pdf_text")
+PAGES_PER_JOB = 8
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+# How long a finished job's status stays available (seconds)
+JOB_RETENTION = 30 * 60
+
+
+def file_hash(path):
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def job_key(path):
+    """Key of a file's job: its path, size and modification time, from one stat."""
+    stat = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+
+
+def _inspect(path):
+    """Worker: content hash and page count of a PDF."""
+    from pypdf import PdfReader
+
+    return file_hash(path), len(PdfReader(path).pages)
+
+
+def _extract_pages(path, start, end, out_dir):
+    """Worker: extract pages [start, end) of a PDF into a text file and an index."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    end = min(end, len(reader.pages))
+    offsets = []
+    blocks = []
+    chunks = []
+    position = 0
+    for page_no in range(start, end):
+        page_blocks = []
+
+        def visitor(text, cm, tm, font_dict, font_size, page_blocks=page_blocks):
+            if text.strip():
+                page_blocks.append([round(tm[4], 1), round(tm[5], 1), text.strip()])
+
+        try:
+            text = reader.pages[page_no].extract_text(visitor_text=visitor) or ""
+        except Exception:
+            text = ""
+        data = text.encode('utf-8')
+        chunks.append(data)
+        offsets.append([position, position + len(data)])
+        blocks.append(page_blocks)
+        position += len(data)
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"pages_{start:05d}_{end:05d}"
+    tmp = uuid.uuid4().hex
+    with open(os.path.join(out_dir, f"{name}.{tmp}.tmp"), 'wb') as f:
+        f.write(b"".join(chunks))
+    with open(os.path.join(out_dir, f"{name}.json.{tmp}.tmp"), 'w') as f:
+        json.dump({"start": start, "end": end, "offsets": offsets, "blocks": blocks}, f)
+    # Text first, index last: a range is only visible once its index exists
+    os.replace(os.path.join(out_dir, f"{name}.{tmp}.tmp"), os.path.join(out_dir, f"{name}.txt"))
+    os.replace(os.path.join(out_dir, f"{name}.json.{tmp}.tmp"), os.path.join(out_dir, f"{name}.json"))
+    return start, end
+
+
+class PdfTextCache:
+    """Read-only view of the extracted pages of one PDF."""
+
+    def __init__(self, digest, cache_dir=PDF_TEXT_DIR):
+        self.dir = os.path.join(cache_dir, digest)
+        self._ranges = []
+        self._indexes = {}
+
+    def _refresh(self):
+        if not os.path.isdir(self.dir):
+            return
+        for name in os.listdir(self.dir):
+            if not name.endswith(".json") or name in self._indexes:
+                continue
+            with open(os.path.join(self.dir, name)) as f:
+                index = json.load(f)
+            self._indexes[name] = index
+            bisect.insort(self._ranges, (index["start"], index["end"], name))
+
+    def _find(self, page_no):
+        idx = bisect.bisect_right(self._ranges, (page_no, float("inf"))) - 1
+        if idx >= 0:
+            start, end, name = self._ranges[idx]
+            if start <= page_no < end:
+                return name
+        return None
+
+    def _lookup(self, page_no):
+        name = self._find(page_no)
+        if name is None:
+            self._refresh()
+            name = self._find(page_no)
+        return name
+
+    def page_text(self, page_no):
+        """Return the text of a page, or None if it has not been extracted yet."""
+        name = self._lookup(page_no)
+        if name is None:
+            return None
+        index = self._indexes[name]
+        begin, finish = index["offsets"][page_no - index["start"]]
+        if begin == finish:
+            return ""
+        with open(os.path.join(self.dir, name[:-5] + ".txt"), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[begin:finish].decode('utf-8')
+
+    def page_blocks(self, page_no):
+        """Return [x, y, text] layout blocks for a page, or None if not extracted yet."""
+        name = self._lookup(page_no)
+        if name is None:
+            return None
+        index = self._indexes[name]
+        return index["blocks"][page_no - index["start"]]
+
+
+class PdfTextService:
+    """Queue of extraction jobs served by a process pool; all calls return immediately."""
+
+    def __init__(self, max_workers=MAX_WORKERS, cache_dir=PDF_TEXT_DIR):
+        self.cache_dir = cache_dir
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, path, pages=None):
+        """Queue a PDF (optionally only a (start, end) page range); returns its job key.
+
+        Chunks are aligned to PAGES_PER_JOB, so overlapping ranges share work and
+        only the chunks of a new range that are not done or pending are queued.
+        A file whose job failed is retried on the next submit. A changed file
+        gets a new key.
+        """
+        key = job_key(path)
+        with self._lock:
+            self._evict_finished()
+            job = self._jobs.get(key)
+            if job is None or job["error"]:
+                job = self._jobs[key] = {
+                    "digest": None, "page_count": None, "inspecting": False, "waiting": [],
+                    "wanted": set(), "pending": set(), "done": set(), "error": None, "finished_at": None,
+                }
+            job["finished_at"] = None
+            if job["page_count"] is not None:
+                self._queue_chunks(key, path, pages)
+                return key
+            job["waiting"].append(pages)
+            if job["inspecting"]:
+                return key
+            job["inspecting"] = True
+        future = self._executor.submit(_inspect, path)
+        future.add_done_callback(lambda f: self._inspected(key, path, f))
+        return key
+
+    def _evict_finished(self):
+        """Forget jobs finished more than JOB_RETENTION ago; call with the lock held."""
+        cutoff = time.monotonic() - JOB_RETENTION
+        for key in [k for k, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[key]
+
+    def _settle(self, job):
+        if not job["pending"] and not job["waiting"] and not job["inspecting"]:
+            job["finished_at"] = time.monotonic()
+
+    def _inspected(self, key, path, inspect_future):
+        with self._lock:
+            job = self._jobs[key]
+            job["inspecting"] = False
+            waiting, job["waiting"] = job["waiting"], []
+            try:
+                job["digest"], job["page_count"] = inspect_future.result()
+            except Exception as e:
+                job["error"] = "cancelled" if inspect_future.cancelled() else str(e)
+            else:
+                for pages in waiting:
+                    self._queue_chunks(key, path, pages)
+            self._settle(job)
+
+    def _queue_chunks(self, key, path, pages):
+        """Queue the missing chunks of a page range; call with the lock held."""
+        job = self._jobs[key]
+        page_count = job["page_count"]
+        start, end = pages if pages else (0, page_count)
+        end = min(end, page_count)
+        out_dir = os.path.join(self.cache_dir, job["digest"])
+        for chunk_start in range(start - start % PAGES_PER_JOB, end, PAGES_PER_JOB):
+            chunk = (chunk_start, min(chunk_start + PAGES_PER_JOB, page_count))
+            job["wanted"].add(chunk)
+            if chunk in job["done"] or chunk in job["pending"]:
+                continue
+            if os.path.exists(os.path.join(out_dir, f"pages_{chunk[0]:05d}_{chunk[1]:05d}.json")):
+                job["done"].add(chunk)
+                continue
+            job["pending"].add(chunk)
+            future = self._executor.submit(_extract_pages, path, chunk[0], chunk[1], out_dir)
+            future.add_done_callback(lambda f, chunk=chunk: self._finish(key, chunk, f))
+        self._settle(job)
+
+    def _finish(self, key, chunk, future):
+        with self._lock:
+            job = self._jobs[key]
+            job["pending"].discard(chunk)
+            if future.cancelled() or future.exception() is not None:
+                job["error"] = "cancelled" if future.cancelled() else str(future.exception())
+            else:
+                job["done"].add(chunk)
+            self._settle(job)
+
+    def status(self, key):
+        """Return progress for a submitted file: content hash, pages extracted and requested, error."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return None
+            extracted = sum(end - start for start, end in job["done"] & job["wanted"])
+            total = sum(end - start for start, end in job["wanted"]) if job["page_count"] is not None else None
+            return {
+                "digest": job["digest"],
+                "extracted": extracted,
+                "total": total,
+                "finished": total is not None and job["finished_at"] is not None,
+                "error": job["error"],
+            }
+
+    def reader(self, key):
+        """Return a cache reader for a submitted file once its content hash is known, else None.
+
+        Pages appear in the reader as their jobs finish.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            digest = job["digest"] if job else None
+        return PdfTextCache(digest, self.cache_dir) if digest else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_pdf_text_service():
+    """Get the process-wide extraction service, starting its pool on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PdfTextService()
+    return _service
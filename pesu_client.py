@@ -0,0 +1,218 @@
+"""Shared access to PESU Academy for every page and background job.
+
+Authenticated upstream sessions (cookies, CSRF token, semester IDs) are saved
+encrypted per user under .sessions/, so a server restart does not force every
+user to log in again. A saved session is reused until it goes idle for
+UPSTREAM_SESSION_TTL seconds or upstream rejects it (a 401/403 or a redirect
+to the login page, which the scrapers report as empty results). Then the user
+is logged in again once and the request is retried; if the fresh session is
+rejected too, SessionExpired is raised and nothing is stored. Other errors are
+raised as they are. Every operation goes through the upstream scheduler (see
+scheduler.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import uuid
+import weakref
+
+import httpx
+from cryptography.fernet import Fernet, InvalidToken
+from pesuacademy import PESUAcademy
+from pesuacademy.exceptions import AuthenticationError, CSRFTokenError
+from pesuacademy.client import _PesuScraper
+from scheduler import INTERACTIVE, UpstreamScheduler, get_scheduler
+
+SESSION_DIR = ".sessions"
+SESSION_KEY_ENV = "PESU_SESSION_KEY"
+UPSTREAM_SESSION_TTL = 20 * 60
+MAX_CONCURRENT_LOGINS = 4
+LOGIN_JITTER = 2.0
+LOGIN_WAIT = 60.0
+
+# Logins are admitted like any other upstream work, fairly across users
+_login_slots = UpstreamScheduler(max_concurrent=MAX_CONCURRENT_LOGINS, interactive_reserve=0)
+# Expiry flags of the clients operations are running on
+_watched = weakref.WeakKeyDictionary()
+_fernet = None
+_fernet_lock = threading.Lock()
+
+
+def get_fernet():
+    """Get the cipher for stored sessions, from PESU_SESSION_KEY or a local key file."""
+    global _fernet
+    if _fernet is None:
+        with _fernet_lock:
+            if _fernet is None:
+                key = os.environ.get(SESSION_KEY_ENV)
+                if not key:
+                    key_file = os.path.join(SESSION_DIR, ".upstream_key")
+                    os.makedirs(SESSION_DIR, exist_ok=True)
+                    if not os.path.exists(key_file):
+                        with open(key_file, 'wb') as f:
+                            f.write(Fernet.generate_key())
+                        try:
+                            os.chmod(key_file, 0o600)
+                        except:
+                            pass
+                    with open(key_file, 'rb') as f:
+                        key = f.read().strip()
+                _fernet = Fernet(key)
+    return _fernet
+
+
+def get_upstream_session_file(username):
+    user_hash = hashlib.sha256(str(username).encode()).hexdigest()[:16]
+    return os.path.join(SESSION_DIR, f"upstream_{user_hash}.bin")
+
+
+def save_upstream_session(username, pesu):
+    """Encrypt and store the cookies and tokens of an authenticated client."""
+    client = pesu._client
+    state = {
+        "cookies": [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+            for c in client._session.cookies.jar
+        ],
+        "csrf_token": client._csrf_token,
+        "semester_ids": {str(k): v for k, v in client._semester_ids.items()},
+    }
+    token = get_fernet().encrypt(json.dumps(state).encode())
+    path = get_upstream_session_file(username)
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+
+
+def load_upstream_session(username):
+    """Rebuild an authenticated client from the stored session, or None if missing or expired."""
+    path = get_upstream_session_file(username)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            state = json.loads(get_fernet().decrypt(f.read(), ttl=UPSTREAM_SESSION_TTL))
+    except (InvalidToken, ValueError, OSError):
+        clear_upstream_session(username)
+        return None
+    client = _PesuScraper()
+    for cookie in state["cookies"]:
+        client._session.cookies.set(
+            cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"]
+        )
+    client._csrf_token = state["csrf_token"]
+    client._semester_ids = {int(k): v for k, v in state["semester_ids"].items()}
+    return PESUAcademy(client)
+
+
+def clear_upstream_session(username):
+    try:
+        os.remove(get_upstream_session_file(username))
+    except OSError:
+        pass
+
+
+async def login_pesu(username, password, stagger=False):
+    """Log in with a cap on concurrent logins; stagger spreads re-logins out after expiry."""
+    if stagger:
+        await asyncio.sleep(random.uniform(0, LOGIN_JITTER))
+    async with _login_slots.slot(username, timeout=LOGIN_WAIT):
+        pesu = await PESUAcademy.login(username, password)
+    save_upstream_session(username, pesu)
+    return pesu
+
+
+async def run_pesu(username, password, operation, priority=INTERACTIVE):
+    """Run operation(pesu) in a scheduler slot, with a stored session if possible.
+
+    Raises SchedulerBusy if the request is not admitted.
+    """
+    async with get_scheduler().slot(username, priority):
+        return await _run_with_session(username, password, operation)
+
+
+class SessionExpired(Exception):
+    """Raised when upstream rejects a session, including one that was just logged in."""
+
+
+def _watch_session(pesu):
+    """Flag the client's session as dead on a 401/403 or a bounce to the login page."""
+    state = {"expired": False}
+
+    async def check(response):
+        path = response.url.path.rstrip("/").lower()
+        if response.status_code in (401, 403) or path.endswith("/academy") or "login" in path:
+            state["expired"] = True
+
+    pesu._client._session.event_hooks["response"].append(check)
+    _watched[pesu] = state
+    return state
+
+
+def check_session(pesu):
+    """Raise SessionExpired if upstream has rejected pesu's session so far.
+
+    Operations that store what they fetched call this before writing, so a
+    login page parsed as "no data" never replaces real data.
+    """
+    state = _watched.get(pesu)
+    if state is not None and state["expired"]:
+        raise SessionExpired("PESU Academy rejected the session")
+
+
+def _session_expired(error, state):
+    if state["expired"] or isinstance(error, (AuthenticationError, CSRFTokenError)):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (401, 403)
+
+
+async def _run_watched(pesu, operation):
+    """Run operation(pesu); raise SessionExpired if upstream rejected the session meanwhile.
+
+    A dead session is bounced to the login page and the scrapers then return
+    empty results instead of raising, so the flag is checked on success too.
+    """
+    session_state = _watch_session(pesu)
+    try:
+        result = await operation(pesu)
+    except Exception as e:
+        if _session_expired(e, session_state):
+            raise SessionExpired("PESU Academy rejected the session") from e
+        # Parse errors and unavailable data are not a reason to log in again
+        raise
+    if session_state["expired"]:
+        raise SessionExpired("PESU Academy rejected the session")
+    return result
+
+
+async def _run_with_session(username, password, operation):
+    pesu = load_upstream_session(username)
+    restored = pesu is not None
+    if not restored:
+        pesu = await login_pesu(username, password)
+    try:
+        try:
+            result = await _run_watched(pesu, operation)
+        except SessionExpired:
+            if not restored:
+                raise
+            # The stored session was rejected or expired upstream: log in again once
+            clear_upstream_session(username)
+            await pesu.close()
+            pesu = await login_pesu(username, password, stagger=True)
+            result = await _run_watched(pesu, operation)
+        save_upstream_session(username, pesu)
+        return result
+    except SessionExpired:
+        # Never keep (or renew) a session upstream has rejected
+        clear_upstream_session(username)
+        raise
+    finally:
+        # Also runs on cancellation, so abandoned requests free their connections
+        await pesu.close()
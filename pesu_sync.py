@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Sync a user's PESU Academy data into the local store without the web app.
+
+Pulls the profile, current semester's courses, the full material tree of
+every course, results for every semester and, optionally, the PDFs. All of it
+is written to the shared cache, the course snapshots in .cache/ and the files/
+mirror. Meant to run off-peak from cron, so the web pages mostly serve synced
+data. Set PESU_CACHE_BACKEND=sqlite so the web processes see the same cache.
+
+Credentials come from PESU_USERNAME and PESU_PASSWORD. If the password is not
+set, it is read from the system keyring (service "pesu-academy"), when the
+keyring package is installed.
+
+Usage: python pesu_sync.py [--semester N] [--pdfs] [--include-large] [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+import uuid
+
+from cache_backend import get_cache, cache_key, CACHE_BACKEND_ENV, CATALOG_TTL, RESULTS_TTL
+from course_stats import get_course_stats
+from course_sync import sync_course
+from dedup import FILES_DIR
+from material_probe import is_large, probe_urls
+from page_utils import parse_semester
+from pesu_client import run_pesu
+from scheduler import BACKGROUND, REQUESTS_PER_SLOT
+
+USERNAME_ENV = "PESU_USERNAME"
+PASSWORD_ENV = "PESU_PASSWORD"
+KEYRING_SERVICE = "pesu-academy"
+DEFAULT_CONCURRENCY = REQUESTS_PER_SLOT
+
+
+def get_credentials():
+    """Username and password from the environment or the keyring."""
+    username = os.environ.get(USERNAME_ENV)
+    if not username:
+        raise SystemExit(f"Set {USERNAME_ENV} to the PRN/SRN to sync")
+    password = os.environ.get(PASSWORD_ENV)
+    if not password:
+        try:
+            import keyring
+
+            password = keyring.get_password(KEYRING_SERVICE, username)
+        except ImportError:
+            pass
+    if not password:
+        raise SystemExit(f"Set {PASSWORD_ENV} or store the password in the keyring under '{KEYRING_SERVICE}'")
+    return username, password
+
+
+def safe_name(name):
+    return re.sub(r'[\\/:*?"<>|]+', "_", name).strip() or "untitled"
+
+
+def pdf_path(directory, title, taken):
+    """Claim a path for a PDF; titles repeated within a unit get a numbered suffix."""
+    path = os.path.join(directory, f"{safe_name(title)}.pdf")
+    n = 2
+    while path in taken:
+        path = os.path.join(directory, f"{safe_name(title)} ({n}).pdf")
+        n += 1
+    taken.add(path)
+    return path
+
+
+def plan_pdfs(courses, snapshots, root=FILES_DIR):
+    """url -> local path of every PDF in the synced trees.
+
+    Paths follow the existing mirror layout, files/<course>/Unit <n>/<title>.pdf,
+    so the Courses page and dedup.py read synced files like the rest.
+    """
+    wanted = {}
+    taken = set()
+    for course in courses:
+        units = snapshots.get(course.id, {}).get("units", {})
+        for number, unit in enumerate(units.values(), start=1):
+            unit_dir = os.path.join(root, safe_name(course.title), f"Unit {number}")
+            for topic in unit["topics"].values():
+                for materials in topic["materials"].values():
+                    for item in materials["items"]:
+                        if item["is_pdf"] and item["url"] not in wanted:
+                            wanted[item["url"]] = pdf_path(unit_dir, item["title"], taken)
+    return wanted
+
+
+async def download_pdf(session, url, path):
+    """Stream a PDF to path atomically; returns the bytes written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    size = 0
+    try:
+        async with session.stream("GET", url) as response:
+            response.raise_for_status()
+            with open(tmp_path, 'wb') as f:
+                async for chunk in response.aiter_bytes():
+                    f.write(chunk)
+                    size += len(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return size
+
+
+class SyncReport:
+    """Wall time and counts of each sync step."""
+
+    def __init__(self):
+        self.steps = []
+
+    def step(self, name, started, detail=""):
+        self.steps.append((name, time.perf_counter() - started, detail))
+        print(f"  {name:<10} {self.steps[-1][1]:7.2f}s  {detail}", flush=True)
+
+    def total(self):
+        return sum(seconds for _, seconds, _ in self.steps)
+
+
+async def sync(username, password, semester=None, pdfs=False, include_large=False, concurrency=DEFAULT_CONCURRENCY):
+    cache = get_cache()
+    report = SyncReport()
+
+    async def run(operation):
+        return await run_pesu(username, password, operation, priority=BACKGROUND)
+
+    started = time.perf_counter()
+    profile = await run(lambda pesu: pesu.get_profile())
+    cache.set(cache_key("profile", username), profile, ttl=CATALOG_TTL)
+    semester = semester or parse_semester(profile.personal.semester)
+    report.step("profile", started, f"semester {semester}")
+
+    started = time.perf_counter()
+    courses_dict = await run(lambda pesu: pesu.get_courses(semester))
+    cache.set(cache_key("courses", username, semester), courses_dict, ttl=CATALOG_TTL)
+    courses = courses_dict.get(semester, [])
+    report.step("courses", started, f"{len(courses)} courses")
+
+    started = time.perf_counter()
+
+    async def sync_all(pesu):
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(sync_course(pesu, course.id, material_budget=None, semaphore=semaphore) for course in courses),
+            return_exceptions=True
+        )
+
+    synced = await run(sync_all)
+    snapshots = {}
+    requests = stale = 0
+    for course, result in zip(courses, synced):
+        if isinstance(result, Exception):
+            print(f"    {course.code}: {result}", file=sys.stderr)
+            continue
+        snapshots[course.id] = result[0]
+        requests += result[1]["requests"]
+        stale += result[1]["lists_stale"]
+    report.step("materials", started, f"{len(snapshots)}/{len(courses)} courses, {requests} requests, {stale} lists failed")
+
+    started = time.perf_counter()
+    found = 0
+    for sem in range(1, semester + 1):
+        try:
+            results = await run(lambda pesu, sem=sem: pesu.get_results(sem))
+        except Exception:
+            continue
+        if results:
+            cache.set(cache_key("results", username, sem), results, ttl=RESULTS_TTL)
+            found += 1
+    report.step("results", started, f"{found}/{semester} semesters")
+
+    if pdfs:
+        started = time.perf_counter()
+        wanted = {url: path for url, path in plan_pdfs(courses, snapshots).items() if not os.path.exists(path)}
+
+        async def fetch_all(pesu):
+            metadata = await probe_urls(pesu, wanted, concurrency=concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
+            skipped = [url for url in wanted if not include_large and is_large(metadata.get(url))]
+
+            async def fetch(url):
+                async with semaphore:
+                    return await download_pdf(pesu._client._session, url, wanted[url])
+
+            sizes = await asyncio.gather(
+                *(fetch(url) for url in wanted if url not in skipped),
+                return_exceptions=True
+            )
+            return sizes, skipped
+
+        sizes, skipped = await run(fetch_all)
+        # PDF sizes are known now, so refresh the per-course totals
+        for snapshot in snapshots.values():
+            get_course_stats().refresh(snapshot)
+        written = [size for size in sizes if not isinstance(size, Exception)]
+        report.step(
+            "pdfs", started,
+            f"{len(written)} downloaded ({sum(written) / 1024 / 1024:.1f} MB), "
+            f"{len(sizes) - len(written)} failed, {len(skipped)} large deferred"
+        )
+
+    print(f"Synced in {report.total():.2f}s")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync PESU Academy data into the local store.")
+    parser.add_argument("--semester", type=int, help="semester to sync courses for (default: current)")
+    parser.add_argument("--pdfs", action="store_true", help="also download material PDFs into files/")
+    parser.add_argument("--include-large", action="store_true", help="download PDFs over 20 MB too")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"upstream requests in flight (at most {REQUESTS_PER_SLOT})")
+    args = parser.parse_args(argv)
+
+    if os.environ.get(CACHE_BACKEND_ENV, "memory").lower() == "memory":
+        print(f"Warning: {CACHE_BACKEND_ENV} is not 'sqlite', so cached data will not reach the web app", file=sys.stderr)
+
+    username, password = get_credentials()
+    print(f"Syncing {username}...")
+    asyncio.run(sync(username, password, args.semester, args.pdfs, args.include_large, min(max(1, args.concurrency), REQUESTS_PER_SLOT)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Fair admission control for requests to PESU Academy.
+
+Every upstream operation takes a slot from one process-wide scheduler before it
+runs. At most MAX_CONCURRENT operations run at once, and INTERACTIVE_RESERVE of
+those slots are kept for interactive requests, so a burst of long background
+jobs cannot lock users out. Waiting operations are served by priority
+(interactive before prefetch before background) and, within a priority,
+round-robin across users, so one user's bulk work cannot starve everyone else.
+When the queue is full, or a wait runs past its limit, the caller gets
+SchedulerBusy straight away instead of hanging.
+
+Waiting costs no thread: each queued request holds a future on its own event
+loop (pages and jobs run on different loops), and a release resolves the next
+one with call_soon_threadsafe.
+
+A slot covers a whole operation, which may fan out into many requests. Those
+fan-outs share a request_limiter() semaphore, so one operation has at most
+REQUESTS_PER_SLOT requests in flight and upstream sees at most
+MAX_CONCURRENT * REQUESTS_PER_SLOT at once.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+INTERACTIVE = 0
+PREFETCH = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BACKGROUND: "background"}
+
+MAX_CONCURRENT = 8
+# Slots prefetch and background work may never take
+INTERACTIVE_RESERVE = 2
+REQUESTS_PER_SLOT = 4
+MAX_QUEUE = 64
+MAX_QUEUE_PER_USER = 8
+# How long each priority may wait for a slot before giving up (seconds)
+MAX_WAIT = {INTERACTIVE: 10.0, PREFETCH: 30.0, BACKGROUND: 120.0}
+BUSY_MESSAGE = "PESU Academy is busy right now, showing what is already loaded. Please try again in a moment."
+
+
+def request_limiter():
+    """Semaphore bounding the requests one scheduled operation has in flight.
+
+    Create it inside the operation: asyncio semaphores belong to the running loop.
+    """
+    return asyncio.Semaphore(REQUESTS_PER_SLOT)
+
+
+async def limited(semaphore, coro):
+    """Await coro while holding semaphore."""
+    async with semaphore:
+        return await coro
+
+
+class SchedulerBusy(Exception):
+    """Raised when a request is not admitted because upstream capacity is exhausted."""
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Ticket:
+    __slots__ = ("user", "priority", "granted", "enqueued_at", "loop", "future")
+
+    def __init__(self, user, priority, loop):
+        self.user = user
+        self.priority = priority
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+        self.loop = loop
+        self.future = loop.create_future()
+
+
+class UpstreamScheduler:
+    """Per-user fair queue in front of a global concurrency cap."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queue=MAX_QUEUE,
+                 max_queue_per_user=MAX_QUEUE_PER_USER, interactive_reserve=INTERACTIVE_RESERVE):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.interactive_reserve = min(interactive_reserve, max_concurrent - 1)
+        self.active = 0
+        self.active_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+        self._queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self._queued = 0
+        self._queued_per_user = {}
+        self._lock = threading.Lock()
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "total_wait": 0.0}
+
+    def _has_room(self, priority):
+        if self.active >= self.max_concurrent:
+            return False
+        if priority == INTERACTIVE:
+            return True
+        others = self.active - self.active_by_priority[INTERACTIVE]
+        return others < self.max_concurrent - self.interactive_reserve
+
+    def _take(self, priority):
+        self.active += 1
+        self.active_by_priority[priority] += 1
+
+    async def acquire(self, user, priority=INTERACTIVE, timeout=None):
+        """Wait for a slot; raises SchedulerBusy if not admitted in time."""
+        timeout = MAX_WAIT[priority] if timeout is None else timeout
+        with self._lock:
+            ahead = any(self._queues[p] for p in self._queues if p <= priority)
+            if self._has_room(priority) and not ahead:
+                self._take(priority)
+                self.stats["admitted"] += 1
+                return
+            if self._queued >= self.max_queue or self._queued_per_user.get(user, 0) >= self.max_queue_per_user:
+                self.stats["rejected"] += 1
+                raise SchedulerBusy(BUSY_MESSAGE)
+
+            ticket = _Ticket(user, priority, asyncio.get_running_loop())
+            self._queues[priority].setdefault(user, deque()).append(ticket)
+            self._queued += 1
+            self._queued_per_user[user] = self._queued_per_user.get(user, 0) + 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                # A grant racing the timeout still counts
+                if not ticket.granted:
+                    self._remove(ticket)
+                    self.stats["timed_out"] += 1
+                    raise SchedulerBusy(BUSY_MESSAGE)
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = ticket.granted
+                if not granted:
+                    self._remove(ticket)
+            if granted:
+                self.release(priority)
+            raise
+        with self._lock:
+            self.stats["admitted"] += 1
+            self.stats["total_wait"] += time.monotonic() - ticket.enqueued_at
+
+    def release(self, priority=INTERACTIVE):
+        """Return a slot and hand it to the next waiting request, if any."""
+        with self._lock:
+            self.active -= 1
+            self.active_by_priority[priority] -= 1
+            self._dispatch()
+
+    def _remove(self, ticket):
+        users = self._queues[ticket.priority]
+        tickets = users.get(ticket.user)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del users[ticket.user]
+            self._dequeued(ticket.user)
+
+    def _dequeued(self, user):
+        self._queued -= 1
+        self._queued_per_user[user] -= 1
+        if not self._queued_per_user[user]:
+            del self._queued_per_user[user]
+
+    def _next_ticket(self):
+        """Pop the next ticket that may run: highest priority first, then round-robin over users."""
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if users and self._has_room(priority):
+                user, tickets = next(iter(users.items()))
+                ticket = tickets.popleft()
+                if tickets:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                return ticket
+        return None
+
+    def _dispatch(self):
+        """Grant free slots to waiting tickets."""
+        while self._queued:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            self._dequeued(ticket.user)
+            try:
+                ticket.loop.call_soon_threadsafe(_wake, ticket.future)
+            except RuntimeError:
+                # The waiter's event loop has already closed
+                continue
+            ticket.granted = True
+            self._take(ticket.priority)
+
+    def snapshot(self):
+        """Current queue depth and counters, for the debug page."""
+        with self._lock:
+            admitted = self.stats["admitted"]
+            return {
+                "active": self.active,
+                "max_concurrent": self.max_concurrent,
+                "active_by_priority": {PRIORITY_NAMES[p]: n for p, n in self.active_by_priority.items()},
+                "queued": self._queued,
+                "queued_by_priority": {
+                    PRIORITY_NAMES[p]: sum(len(t) for t in users.values())
+                    for p, users in self._queues.items()
+                },
+                "queued_users": len(self._queued_per_user),
+                "admitted": admitted,
+                "rejected": self.stats["rejected"],
+                "timed_out": self.stats["timed_out"],
+                "avg_wait_ms": round(self.stats["total_wait"] / admitted * 1000, 1) if admitted else 0.0,
+            }
+
+    @asynccontextmanager
+    async def slot(self, user, priority=INTERACTIVE, timeout=None):
+        """Hold a scheduler slot for the duration of an async block."""
+        await self.acquire(user, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Get the process-wide upstream scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = UpstreamScheduler()
+    return _scheduler
@@ -0,0 +1,93 @@
+"""Compact binary serialization for cached PESU data.
+
+Each kind of cached value has a registered schema: the pydantic type it holds
+and a version number. Values are dumped and validated with a pydantic
+TypeAdapter (both run in pydantic-core) and packed with msgpack. The header
+stores the schema name and a fingerprint of its version and JSON schema. If
+the app or the pesuacademy models change, older entries raise SchemaMismatch
+and are treated as a cache miss. Values without a schema use plain msgpack when
+possible and pickle otherwise.
+"""
+
+import json
+import pickle
+import threading
+import zlib
+
+import msgpack
+from pydantic import TypeAdapter
+
+FORMAT_SCHEMA = b"S"
+FORMAT_MSGPACK = b"M"
+FORMAT_PICKLE = b"P"
+
+_schemas = None
+_schemas_lock = threading.Lock()
+
+
+class SchemaMismatch(ValueError):
+    """Raised when cached data was written with a different schema."""
+
+
+def _schema_types():
+    """Schema name -> (type, version). Bump the version when a type's meaning changes."""
+    from pesuacademy.models import Course, MaterialLink, Profile, SemesterResult, Topic, Unit
+
+    return {
+        "profile": (Profile, 1),
+        "courses": (dict[int, list[Course]], 1),
+        "units": (list[Unit], 1),
+        "topics": (list[Topic], 1),
+        "materials": (list[MaterialLink], 1),
+        "results": (SemesterResult, 1),
+        "course_tree": (list[tuple[Unit, list[tuple[Topic, dict[str, list[MaterialLink]]]]]], 1),
+    }
+
+
+def get_schemas():
+    """Schema name -> (TypeAdapter, fingerprint), built on first use."""
+    global _schemas
+    if _schemas is None:
+        with _schemas_lock:
+            if _schemas is None:
+                schemas = {}
+                for name, (tp, version) in _schema_types().items():
+                    adapter = TypeAdapter(tp)
+                    described = json.dumps(adapter.json_schema(), sort_keys=True)
+                    schemas[name] = (adapter, zlib.crc32(f"{version}:{described}".encode()))
+                _schemas = schemas
+    return _schemas
+
+
+def dumps(value, schema=None):
+    """Serialize a value to bytes; pass the schema name when the value has one."""
+    if schema is not None and schema in get_schemas():
+        adapter, fingerprint = get_schemas()[schema]
+        payload = adapter.dump_python(value, mode="json")
+        return FORMAT_SCHEMA + msgpack.packb([schema, fingerprint, payload], use_bin_type=True)
+    try:
+        return FORMAT_MSGPACK + msgpack.packb(value, use_bin_type=True)
+    except (TypeError, ValueError, OverflowError):
+        return FORMAT_PICKLE + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    """Deserialize bytes produced by dumps(); raises SchemaMismatch for stale entries."""
+    data = bytes(data)
+    if data[:1] == FORMAT_SCHEMA:
+        schema, fingerprint, payload = msgpack.unpackb(data[1:], raw=False, strict_map_key=False)
+        entry = get_schemas().get(schema)
+        if entry is None or entry[1] != fingerprint:
+            raise SchemaMismatch(f"Cached {schema} data has an outdated schema")
+        return entry[0].validate_python(payload)
+    if data[:1] == FORMAT_MSGPACK:
+        return msgpack.unpackb(data[1:], raw=False, strict_map_key=False)
+    if data[:1] == FORMAT_PICKLE:
+        return pickle.loads(data[1:])
+    raise ValueError("Unknown serialization format")
+
+
+def schema_for_key(key):
+    """The schema for a namespaced cache key (its first part), if it has one."""
+    namespace = key.split(":", 1)[0]
+    return namespace if namespace in get_schemas() else None
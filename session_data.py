@@ -0,0 +1,123 @@
+"""Size-accounted, LRU-bounded data area for each browser session.
+
+Pages keep fetched course data here instead of in loose ``st.session_state``
+keys. Each entry's size is measured when it is stored. Once a session goes over
+its budget, the least recently used entries are evicted, which in practice is
+the data of courses the user has moved away from. Every live data area is
+tracked so the debug page can report memory use for the whole process.
+"""
+
+import os
+import pickle
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import streamlit as st
+
+SESSION_DATA_BUDGET = 8 * 1024 * 1024
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a value, in bytes."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class SessionData:
+    """LRU mapping with a byte budget; entries can be tagged with a group such as a course ID."""
+
+    def __init__(self, budget=SESSION_DATA_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value, group=None):
+        size = estimate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size, group)
+            self.size += size
+            while self.size > self.budget and len(self._entries) > 1:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.size -= entry[1]
+            return entry[0]
+
+    def drop_group(self, group):
+        """Remove every entry tagged with group."""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[2] == group]:
+                self.size -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_session_data():
+    """Get the data area for the current browser session."""
+    if 'session_data' not in st.session_state:
+        data = SessionData()
+        with _registry_lock:
+            _registry.add(data)
+        st.session_state.session_data = data
+    return st.session_state.session_data
+
+
+def get_rss_bytes():
+    """Current resident memory of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def memory_report():
+    """Summarise session data usage across every live session in this process."""
+    with _registry_lock:
+        areas = list(_registry)
+    sizes = sorted((area.size for area in areas), reverse=True)
+    return {
+        "sessions": len(areas),
+        "accounted_bytes": sum(sizes),
+        "largest_session_bytes": sizes[0] if sizes else 0,
+        "entries": sum(len(area) for area in areas),
+        "evictions": sum(area.evictions for area in areas),
+        "budget_per_session": SESSION_DATA_BUDGET,
+        "process_rss_bytes": get_rss_bytes(),
+    }
@@ -0,0 +1,255 @@
+"""Indexed registry of the session files in .sessions/.
+
+Each ``session_<id>.json`` file has a row in a SQLite index holding its
+username and expiry time. Lookups, listings and expiry checks read the index
+instead of parsing every file. Session files written outside save_session()
+are picked up by sync_index(), which lists the directory and parses only
+files the index does not know. It runs when the registry is opened and before
+each background sweep. The sweeper deletes expired sessions in batches.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+SESSION_DIR = ".sessions"
+REGISTRY_FILE = os.path.join(SESSION_DIR, "registry.sqlite3")
+SESSION_TTL = timedelta(hours=24)
+SWEEP_INTERVAL = 15 * 60
+SWEEP_BATCH_SIZE = 200
+
+
+def get_session_file(session_id):
+    return os.path.join(SESSION_DIR, f"session_{session_id}.json")
+
+
+def _expires_at(data):
+    last_accessed = datetime.fromisoformat(data.get('last_accessed', datetime.now().isoformat()))
+    return (last_accessed + SESSION_TTL).timestamp()
+
+
+class SessionRegistry:
+    """Session files plus an index of (session_id, username, expires_at)."""
+
+    def __init__(self, path=REGISTRY_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, username TEXT, "
+            "created_at TEXT, last_accessed TEXT, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_username ON sessions (username)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        conn.commit()
+        self.sync_index()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _index(self, conn, session_id, data):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+            (session_id, data.get('username'), data.get('created_at'),
+             data.get('last_accessed'), _expires_at(data)),
+        )
+
+    def _index_file(self, conn, session_id):
+        try:
+            with open(get_session_file(session_id), 'r') as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        self._index(conn, session_id, data)
+        return True
+
+    def sync_index(self):
+        """Index session files missing from the index and drop rows whose file is gone."""
+        on_disk = {
+            name[len("session_"):-len(".json")]
+            for name in os.listdir(SESSION_DIR)
+            if name.startswith("session_") and name.endswith(".json")
+        }
+        conn = self._connect()
+        indexed = {row[0] for row in conn.execute("SELECT session_id FROM sessions")}
+        for session_id in on_disk - indexed:
+            self._index_file(conn, session_id)
+        conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(s,) for s in indexed - on_disk])
+        conn.commit()
+
+    def rebuild_index(self):
+        """Re-index every session file from scratch."""
+        conn = self._connect()
+        conn.execute("DELETE FROM sessions")
+        conn.commit()
+        self.sync_index()
+
+    def save_session(self, session_id, data):
+        """Write a session file atomically and update its index row."""
+        now = datetime.now().isoformat()
+        data = dict(data, device_id=data.get('device_id', session_id), last_accessed=now)
+        data.setdefault('created_at', now)
+        path = get_session_file(session_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        conn = self._connect()
+        self._index(conn, session_id, data)
+        conn.commit()
+        return data
+
+    def get_entry(self, session_id):
+        """Index row for a session, or None if unknown or expired."""
+        row = self._connect().execute(
+            "SELECT session_id, username, created_at, last_accessed, expires_at "
+            "FROM sessions WHERE session_id = ? AND expires_at >= ?",
+            (session_id, time.time()),
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def session_status(self, session_id):
+        """"live", "expired", "unindexed" (file not in the index yet) or "missing"."""
+        row = self._connect().execute(
+            "SELECT expires_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is not None:
+            return "live" if row[0] >= time.time() else "expired"
+        return "unindexed" if os.path.exists(get_session_file(session_id)) else "missing"
+
+    def load_session(self, session_id):
+        """Load a live session's data; expired or missing sessions return None."""
+        if self.session_status(session_id) == "unindexed":
+            conn = self._connect()
+            self._index_file(conn, session_id)
+            conn.commit()
+        if self.get_entry(session_id) is None:
+            return None
+        try:
+            with open(get_session_file(session_id), 'r') as f:
+                return json.load(f)
+        except Exception:
+            self.delete_session(session_id)
+            return None
+
+    def find_by_username(self, username):
+        """Live sessions for a username, most recently used first."""
+        rows = self._connect().execute(
+            "SELECT session_id, username, created_at, last_accessed, expires_at FROM sessions "
+            "WHERE username = ? AND expires_at >= ? ORDER BY expires_at DESC",
+            (username, time.time()),
+        ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def list_sessions(self, include_expired=False):
+        """All indexed sessions, soonest to expire first, without reading the files."""
+        query = "SELECT session_id, username, created_at, last_accessed, expires_at FROM sessions"
+        params = ()
+        if not include_expired:
+            query += " WHERE expires_at >= ?"
+            params = (time.time(),)
+        rows = self._connect().execute(query + " ORDER BY expires_at", params).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def delete_session(self, session_id):
+        try:
+            os.remove(get_session_file(session_id))
+        except OSError:
+            pass
+        conn = self._connect()
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+
+    def clear_sessions(self):
+        """Delete every indexed session file and its row."""
+        for entry in self.list_sessions(include_expired=True):
+            self.delete_session(entry["session_id"])
+
+    def sweep_expired(self, batch_size=SWEEP_BATCH_SIZE):
+        """Delete expired sessions in batches; returns how many were removed."""
+        removed = 0
+        conn = self._connect()
+        while True:
+            expired = [row[0] for row in conn.execute(
+                "SELECT session_id FROM sessions WHERE expires_at < ? ORDER BY expires_at LIMIT ?",
+                (time.time(), batch_size),
+            )]
+            if not expired:
+                return removed
+            # A file refreshed by a writer that bypassed save_session() is re-indexed, not deleted
+            refreshed = set()
+            for session_id in expired:
+                try:
+                    with open(get_session_file(session_id), 'r') as f:
+                        data = json.load(f)
+                    if _expires_at(data) >= time.time():
+                        self._index(conn, session_id, data)
+                        refreshed.add(session_id)
+                        continue
+                except Exception:
+                    pass
+                try:
+                    os.remove(get_session_file(session_id))
+                except OSError:
+                    pass
+            deleted = [s for s in expired if s not in refreshed]
+            conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(s,) for s in deleted])
+            conn.commit()
+            removed += len(deleted)
+
+    @staticmethod
+    def _row_to_entry(row):
+        session_id, username, created_at, last_accessed, expires_at = row
+        return {
+            "session_id": session_id,
+            "username": username,
+            "created_at": created_at,
+            "last_accessed": last_accessed,
+            "expires_at": datetime.fromtimestamp(expires_at).isoformat(),
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+_sweeper = None
+
+
+def get_session_registry():
+    """Get the process-wide session registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SessionRegistry()
+    return _registry
+
+
+def start_sweeper(interval=SWEEP_INTERVAL):
+    """Start the background expiry sweeper for this process (once)."""
+    global _sweeper
+    with _registry_lock:
+        if _sweeper is not None and _sweeper.is_alive():
+            return
+
+        def sweep():
+            while True:
+                try:
+                    get_session_registry().sync_index()
+                    get_session_registry().sweep_expired()
+                except Exception:
+                    pass
+                time.sleep(interval)
+
+        _sweeper = threading.Thread(target=sweep, name="session-sweeper", daemon=True)
+        _sweeper.start()
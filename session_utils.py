@@ -1,31 +1,115 @@
-import json
+"""Browser session bootstrap: one cookie read per browser session.
+
+main.py calls bootstrap_session() at the top of every script run. The
+CookieManager component is rendered only until its cookies arrive, which
+takes the first run plus the rerun its reply triggers. The decoded session is
+then memoized in st.session_state and later runs do no component round-trip
+at all. Pages queue cookie writes and deletes with set_session_cookie() and
+delete_session_cookie(). Queued changes are coalesced per cookie name and
+flushed once per run by flush_cookie_updates().
+"""
+
+import time
+from datetime import datetime, timedelta
+
 import streamlit as st
 import extra_streamlit_components as stx
+from image_cache import strip_profile_image
+from page_utils import decode_session_cookie
 
 COOKIE_NAME = "pesu_session"
 COOKIE_MANAGER_KEY = "pesu_cookie_manager"
+COOKIE_MAX_AGE = timedelta(days=30)
+# The first run renders the component; its reply arrives on the next one
+BOOTSTRAP_READS = 2
+
+BOOTSTRAP_KEY = "session_bootstrap"
+PENDING_COOKIES_KEY = "pending_cookie_updates"
+
+
+def _bootstrap_state():
+    if BOOTSTRAP_KEY not in st.session_state:
+        st.session_state[BOOTSTRAP_KEY] = {
+            "done": False,
+            "reads": 0,
+            "started": time.perf_counter(),
+            "seconds": None,
+            "decode_ms": None,
+            "session": None,
+        }
+    return st.session_state[BOOTSTRAP_KEY]
+
 
+def _apply_session(session_data):
+    st.session_state.logged_in = True
+    st.session_state.profile = session_data.get("profile")
+    st.session_state.pesu_username = session_data.get("username")
+    st.session_state.pesu_password = session_data.get("password")
+    # Older cookies still carry the base64 photo inside the profile
+    st.session_state.profile_image_key = (
+        strip_profile_image(st.session_state.profile) or session_data.get("image_key")
+    )
 
-def get_cookie_manager():
-    """Get or create cookie manager instance stored in session state."""
-    if "cookie_manager" not in st.session_state:
-        st.session_state.cookie_manager = stx.CookieManager(key=COOKIE_MANAGER_KEY)
-    return st.session_state.cookie_manager
 
+def bootstrap_session():
+    """Restore the login from the browser cookie, reading it once per browser session."""
+    state = _bootstrap_state()
+    if not state["done"]:
+        state["reads"] += 1
+        try:
+            cookies = stx.CookieManager(key=COOKIE_MANAGER_KEY).cookies or {}
+        except Exception:
+            cookies = {}
+        if cookies or state["reads"] >= BOOTSTRAP_READS:
+            state["done"] = True
+            session_cookie = cookies.get(COOKIE_NAME)
+            if session_cookie:
+                started = time.perf_counter()
+                try:
+                    state["session"] = decode_session_cookie(session_cookie)
+                except Exception:
+                    state["session"] = None
+                state["decode_ms"] = (time.perf_counter() - started) * 1000
+            state["seconds"] = time.perf_counter() - state["started"]
+            if state["session"] and not st.session_state.get("logged_in"):
+                _apply_session(state["session"])
+    flush_cookie_updates()
 
-def restore_session_from_cookie():
-    """Restore session state from browser cookie if available."""
-    if st.session_state.get("logged_in"):
+
+def set_session_cookie(value, session_data=None):
+    """Queue a write of the session cookie; session_data keeps the memo in step."""
+    st.session_state.setdefault(PENDING_COOKIES_KEY, {})[COOKIE_NAME] = value
+    _bootstrap_state()["session"] = session_data
+
+
+def delete_session_cookie():
+    """Queue removal of the session cookie and forget the memoized session."""
+    st.session_state.setdefault(PENDING_COOKIES_KEY, {})[COOKIE_NAME] = None
+    _bootstrap_state()["session"] = None
+
+
+def flush_cookie_updates():
+    """Send queued cookie changes to the browser, at most one per cookie name."""
+    pending = st.session_state.get(PENDING_COOKIES_KEY)
+    if not pending:
         return
+    st.session_state[PENDING_COOKIES_KEY] = {}
+    manager = stx.CookieManager(key=f"{COOKIE_MANAGER_KEY}_write")
+    for name, value in pending.items():
+        if value is None:
+            manager.delete(name, key=f"delete_{name}")
+        else:
+            manager.set(name, value, expires_at=datetime.now() + COOKIE_MAX_AGE, key=f"set_{name}")
+
 
-    try:
-        cookie_manager = get_cookie_manager()
-        session_cookie = cookie_manager.get(COOKIE_NAME)
-        if session_cookie:
-            session_data = json.loads(session_cookie)
-            st.session_state.logged_in = True
-            st.session_state.profile = session_data.get("profile")
-            st.session_state.pesu_username = session_data.get("username")
-            st.session_state.pesu_password = session_data.get("password")
-    except Exception:
-        pass
+def bootstrap_report():
+    """How the current browser session was bootstrapped, for the debug page."""
+    state = _bootstrap_state()
+    return {
+        "done": state["done"],
+        "component_reads": state["reads"],
+        "bootstrap_seconds": state["seconds"],
+        "decode_ms": state["decode_ms"],
+        "restored": state["session"] is not None,
+        "pending_cookie_updates": len(st.session_state.get(PENDING_COOKIES_KEY) or {}),
+    }
@@ -1,9 +1,7 @@
 import streamlit as st
-import base64
-from io import BytesIO
-from session_utils import get_cookie_manager, restore_session_from_cookie
-
-restore_session_from_cookie()
+from session_utils import delete_session_cookie
+from image_cache import get_image
+from pesu_client import clear_upstream_session
 
 # Check if user is logged in
 if not st.session_state.get('logged_in', False):
@@ -26,19 +24,9 @@ col_img, col_details = st.columns([1, 3])
 
 with col_img:
     # Display profile image if available
-    image_data = personal.get('image') if isinstance(personal, dict) else personal.image
-    if image_data:
-        try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
-            st.image(image_bytes, use_container_width=True)
-        except:
-            # If decoding fails, show placeholder
-            st.markdown("""
-            <div style="background-color: #f0f2f6; padding: 100px 20px; text-align: center; border-radius: 8px;">
-                <p style="font-size: 48px; margin: 0;">👤</p>
-            </div>
-            """, unsafe_allow_html=True)
+    image_bytes = get_image(st.session_state.get('profile_image_key'), "panel")
+    if image_bytes:
+        st.image(image_bytes, use_container_width=True)
     else:
         # Placeholder if no image
         st.markdown("""
@@ -107,15 +95,17 @@ st.divider()
 st.header("Account")
 
 if st.button("Logout", use_container_width=True, type="secondary",icon=":material/logout:"):
-    # Clear browser cookie
-    cookie_manager = get_cookie_manager()
-    cookie_manager.delete('pesu_session')
+    # Forget the stored upstream session and clear browser cookie
+    clear_upstream_session(st.session_state.get('pesu_username'))
+    delete_session_cookie()
     
     # Clear session state
     st.session_state.logged_in = False
     st.session_state.profile = None
     st.session_state.pesu_username = None
     st.session_state.pesu_password = None
+    st.session_state.profile_image_key = None
+    st.session_state.pop('task_store', None)
     st.success("Logged out successfully!")
     st.rerun()
 
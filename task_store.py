@@ -0,0 +1,123 @@
+"""Persistent per-user task store for the dashboard to-do list.
+
+Tasks are rows of one SQLite table keyed by (user, task ID), so every tab,
+worker process and replica sharing .tasks/ reads and changes the same rows
+instead of overwriting each other's copy of the whole list. An index on the
+due date serves the ordered listing.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+TASKS_DIR = ".tasks"
+TASKS_DB = os.path.join(TASKS_DIR, "tasks.sqlite3")
+
+
+def _user_hash(username):
+    return hashlib.sha256(str(username).encode()).hexdigest()[:16]
+
+
+def get_tasks_file(username):
+    """Path of a user's tasks in the older one-JSON-file-per-user format."""
+    return os.path.join(TASKS_DIR, f"tasks_{_user_hash(username)}.json")
+
+
+class TaskStore:
+    """A user's tasks keyed by a stable ID, listed in due-date order."""
+
+    def __init__(self, username, path=TASKS_DB):
+        self.username = username
+        self.path = path
+        self._user = _user_hash(username)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "user TEXT NOT NULL, id TEXT NOT NULL, title TEXT NOT NULL, due TEXT, created_at TEXT NOT NULL, "
+            "PRIMARY KEY (user, id)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_by_due ON tasks (user, due IS NULL, due, created_at)")
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @classmethod
+    def load(cls, username, path=TASKS_DB):
+        """Open a user's tasks, importing an older JSON task file once."""
+        store = cls(username, path)
+        store._import_json(get_tasks_file(username))
+        return store
+
+    def _import_json(self, json_path):
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r') as f:
+                tasks = json.load(f)
+        except Exception:
+            tasks = []
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks VALUES (?, ?, ?, ?, ?)",
+                [(self._user, t['id'], t['title'], t.get('due'), t['created_at']) for t in tasks],
+            )
+        os.remove(json_path)
+
+    def add_task(self, title, due=None):
+        """Add a task and return its ID."""
+        task_id = uuid.uuid4().hex[:12]
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                (self._user, task_id, title, due.isoformat() if isinstance(due, dt.date) else due,
+                 dt.datetime.now().isoformat()),
+            )
+        return task_id
+
+    def remove_task(self, task_id):
+        """Remove a task, returning it if it existed."""
+        task = self.get_task(task_id)
+        if task is not None:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM tasks WHERE user = ? AND id = ?", (self._user, task_id))
+        return task
+
+    def finish_task(self, task_id):
+        """Mark a task as completed, which removes it from the list."""
+        return self.remove_task(task_id)
+
+    def get_task(self, task_id):
+        row = self._connect().execute(
+            "SELECT id, title, due, created_at FROM tasks WHERE user = ? AND id = ?", (self._user, task_id)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def __contains__(self, task_id):
+        return self.get_task(task_id) is not None
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM tasks WHERE user = ?", (self._user,)).fetchone()[0]
+
+    def get_tasks(self):
+        """Return tasks ordered by due date (undated last), then creation time."""
+        rows = self._connect().execute(
+            "SELECT id, title, due, created_at FROM tasks WHERE user = ? ORDER BY due IS NULL, due, created_at",
+            (self._user,),
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -9,8 +9,7 @@ sys.path.insert(0, os.getcwd())
 import hashlib
 import platform
 import socket
-import json
-from datetime import datetime, timedelta
+from session_registry import get_session_registry
 
 SESSION_DIR = ".sessions"
 os.makedirs(SESSION_DIR, exist_ok=True)
@@ -76,20 +75,22 @@ def load_session():
     
     if os.path.exists(session_file):
         try:
-            with open(session_file, 'r') as f:
-                data = json.load(f)
+            # The registry index rejects expired sessions (24 hours) without reading the file
+            registry = get_session_registry()
+            status = registry.session_status(get_session_id())
+            data = registry.load_session(get_session_id())
+            if data is None:
+                if status == "expired":
+                    print("ERROR: Session expired!")
+                else:
+                    print(f"ERROR: Session could not be indexed (status: {status})")
+                return None
             
             # Verify this is the correct device
             if data.get('device_id') != get_session_id():
                 print("ERROR: Device ID mismatch!")
                 return None
             
-            # Check if session has expired (24 hours)
-            last_accessed = datetime.fromisoformat(data.get('last_accessed', datetime.now().isoformat()))
-            if datetime.now() - last_accessed > timedelta(hours=24):
-                print("ERROR: Session expired!")
-                return None
-            
             print("✓ Session loaded successfully")
             return data
         except Exception as e:
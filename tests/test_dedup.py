@@ -0,0 +1,61 @@
+"""Regression tests for duplicate detection (dedup.py)."""
+
+import hashlib
+import os
+import random
+
+import pytest
+
+import dedup
+
+
+def page(seed):
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randrange(5000)}" for _ in range(200))
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    documents = {}
+
+    def add(path, pages):
+        full = tmp_path / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_bytes("\f".join(pages).encode())
+        documents[path.replace("/", os.sep)] = pages
+
+    def extract_all_pages(paths, root):
+        digests = {p: hashlib.sha256((tmp_path / p).read_bytes()).hexdigest() for p in paths}
+        return digests, {p: documents[p] for p in paths}
+
+    monkeypatch.setattr(dedup, "extract_all_pages", extract_all_pages)
+    return tmp_path, add
+
+
+def test_duplicates_point_at_one_canonical_file(mirror):
+    root, add = mirror
+    question_bank = [page(i) for i in range(4)]
+    add("A/U1/QA.pdf", question_bank + [page(99)])
+    add("C/U1/QB.pdf", question_bank)
+    add("C/U2/QB.pdf", question_bank)
+    add("D/U1/Notes.pdf", [page(i) for i in range(10, 14)])
+
+    duplicates = dedup.build_index(str(root))["duplicates"]
+
+    assert duplicates[os.path.join("C", "U1", "QB.pdf")]["of"] == os.path.join("A", "U1", "QA.pdf")
+    assert duplicates[os.path.join("C", "U2", "QB.pdf")]["of"] == os.path.join("A", "U1", "QA.pdf")
+    assert os.path.join("A", "U1", "QA.pdf") not in duplicates
+    assert os.path.join("D", "U1", "Notes.pdf") not in duplicates
+    assert not any(info["of"] in duplicates for info in duplicates.values())
+
+
+def test_exact_copies_of_a_canonical_file(mirror):
+    root, add = mirror
+    add("C/U1/QB.pdf", [page(1), page(2)])
+    add("C/U2/QB.pdf", [page(1), page(2)])
+
+    duplicates = dedup.build_index(str(root))["duplicates"]
+
+    assert duplicates == {
+        os.path.join("C", "U2", "QB.pdf"): {"of": os.path.join("C", "U1", "QB.pdf"), "kind": "exact", "similarity": 1.0}
+    }
@@ -0,0 +1,85 @@
+"""Regression tests for stored upstream sessions (pesu_client.py)."""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+from pesuacademy import PESUAcademy
+from pesuacademy.client import _PesuScraper
+
+import pesu_client
+
+
+def make_pesu(handler):
+    client = _PesuScraper()
+    client._session = httpx.AsyncClient(
+        base_url=client._base_url, follow_redirects=True, transport=httpx.MockTransport(handler)
+    )
+    return PESUAcademy(client)
+
+
+def dead_session(request):
+    # An expired session is bounced to the login page with a 200
+    if request.url.path != "/Academy/":
+        return httpx.Response(302, headers={"Location": "https://www.pesuacademy.com/Academy/"})
+    return httpx.Response(200, text="<html>login</html>")
+
+
+def live_session(request):
+    return httpx.Response(200, text="<html>units</html>")
+
+
+async def list_units(pesu):
+    response = await pesu._client._session.get("/s/studentProfilePESUAdmin")
+    return [] if "login" in response.text else ["Unit 1"]
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pesu_client, "_fernet", None)
+    logins = []
+
+    async def login(username, password, stagger=False):
+        logins.append(username)
+        pesu = make_pesu(live_session)
+        pesu_client.save_upstream_session(username, pesu)
+        return pesu
+
+    monkeypatch.setattr(pesu_client, "login_pesu", login)
+    return logins
+
+
+def test_dead_restored_session_logs_in_again(sessions, monkeypatch):
+    pesu_client.save_upstream_session("alice", make_pesu(dead_session))
+    monkeypatch.setattr(pesu_client, "load_upstream_session", lambda username: make_pesu(dead_session))
+
+    result = asyncio.run(pesu_client.run_pesu("alice", "secret", list_units))
+
+    assert result == ["Unit 1"]
+    assert sessions == ["alice"]
+
+
+def test_rejected_fresh_session_is_not_stored(sessions, monkeypatch):
+    async def login(username, password, stagger=False):
+        sessions.append(username)
+        pesu = make_pesu(dead_session)
+        pesu_client.save_upstream_session(username, pesu)
+        return pesu
+
+    monkeypatch.setattr(pesu_client, "login_pesu", login)
+
+    with pytest.raises(pesu_client.SessionExpired):
+        asyncio.run(pesu_client.run_pesu("alice", "secret", list_units))
+
+    assert sessions == ["alice"]
+    assert not os.path.exists(pesu_client.get_upstream_session_file("alice"))
+
+
+def test_live_session_is_reused(sessions, monkeypatch):
+    monkeypatch.setattr(pesu_client, "load_upstream_session", lambda username: make_pesu(live_session))
+
+    assert asyncio.run(pesu_client.run_pesu("alice", "secret", list_units)) == ["Unit 1"]
+    assert sessions == []
+    assert os.path.exists(pesu_client.get_upstream_session_file("alice"))
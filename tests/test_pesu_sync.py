@@ -0,0 +1,53 @@
+"""Regression tests for the offline sync CLI (pesu_sync.py)."""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import httpx
+
+from cache_backend import cache_key, get_cache
+from material_probe import LARGE_MATERIAL_BYTES, is_large, probe_urls
+from pesu_sync import plan_pdfs
+
+
+def test_cached_large_pdfs_stay_deferred():
+    url = "https://www.pesuacademy.com/Academy/s/referenceMeterials/large.pdf"
+    get_cache().set(cache_key("material_meta", url), {"size": LARGE_MATERIAL_BYTES + 1, "mime": "application/pdf", "pages": 300})
+
+    def no_requests(request):
+        raise AssertionError(f"unexpected request to {request.url}")
+
+    session = httpx.AsyncClient(transport=httpx.MockTransport(no_requests))
+    pesu = SimpleNamespace(_client=SimpleNamespace(_session=session))
+
+    metadata = asyncio.run(probe_urls(pesu, [url]))
+
+    assert is_large(metadata.get(url))
+
+
+def item(url, title):
+    return {"url": url, "title": title, "is_pdf": True, "seen_at": 0}
+
+
+def test_pdfs_follow_the_existing_mirror_layout():
+    course = SimpleNamespace(id=1, title="Engineering Mechanics")
+    snapshot = {"course_id": 1, "units": {
+        "u1": {"title": "Statics", "topics": {
+            "t1": {"materials": {"1": {"items": [item("a", "QB"), item("b", "QB")]}}},
+            "t2": {"materials": {"3": {"items": [item("c", "QA"), item("a", "QB")]}}},
+        }},
+        "u2": {"title": "Dynamics", "topics": {
+            "t3": {"materials": {"1": {"items": [item("d", "QB")]}}},
+        }},
+    }}
+
+    wanted = plan_pdfs([course], {1: snapshot}, root="files")
+
+    unit_1 = os.path.join("files", "Engineering Mechanics", "Unit 1")
+    assert wanted == {
+        "a": os.path.join(unit_1, "QB.pdf"),
+        "b": os.path.join(unit_1, "QB (2).pdf"),
+        "c": os.path.join(unit_1, "QA.pdf"),
+        "d": os.path.join("files", "Engineering Mechanics", "Unit 2", "QB.pdf"),
+    }
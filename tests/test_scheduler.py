@@ -0,0 +1,88 @@
+"""Regression tests for the upstream scheduler (scheduler.py)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from scheduler import BACKGROUND, INTERACTIVE, PREFETCH, SchedulerBusy, UpstreamScheduler
+
+
+def test_interactive_waiter_goes_before_queued_background_jobs():
+    scheduler = UpstreamScheduler(max_concurrent=1, max_queue=100, max_queue_per_user=100, interactive_reserve=0)
+    admitted = []
+
+    async def job(user, priority):
+        async with scheduler.slot(user, priority, timeout=5):
+            admitted.append(priority)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        await scheduler.acquire("holder")
+        # More waiters than the default executor has threads
+        jobs = [asyncio.create_task(job(f"bg{i}", BACKGROUND)) for i in range(40)]
+        await asyncio.sleep(0)
+        jobs.append(asyncio.create_task(job("alice", INTERACTIVE)))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    assert admitted[0] == INTERACTIVE
+    assert len(admitted) == 41
+
+
+def test_nested_waits_do_not_stall_a_full_scheduler():
+    scheduler = UpstreamScheduler(max_concurrent=1, max_queue=100, max_queue_per_user=100)
+    logins = UpstreamScheduler(max_concurrent=1)
+    errors = []
+
+    def caller(i):
+        async def run():
+            async with scheduler.slot(f"user{i}", INTERACTIVE, timeout=5):
+                async with logins.slot(f"user{i}", timeout=5):
+                    await asyncio.sleep(0.01)
+
+        try:
+            asyncio.run(run())
+        except SchedulerBusy as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert scheduler.active == 0
+
+
+def test_background_work_leaves_slots_for_interactive():
+    scheduler = UpstreamScheduler(max_concurrent=3, interactive_reserve=1)
+
+    async def main():
+        await scheduler.acquire("a", BACKGROUND)
+        await scheduler.acquire("b", PREFETCH)
+        with pytest.raises(SchedulerBusy):
+            await scheduler.acquire("c", BACKGROUND, timeout=0.05)
+        await asyncio.wait_for(scheduler.acquire("d", INTERACTIVE), 0.05)
+
+    asyncio.run(main())
+    assert scheduler.active_by_priority == {INTERACTIVE: 1, PREFETCH: 1, BACKGROUND: 1}
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = UpstreamScheduler(max_concurrent=1)
+
+    async def main():
+        await scheduler.acquire("holder")
+        waiter = asyncio.create_task(scheduler.acquire("alice", timeout=5))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+
+    asyncio.run(main())
+    assert scheduler.active == 0
+    assert scheduler.snapshot()["queued"] == 0
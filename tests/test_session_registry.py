@@ -0,0 +1,40 @@
+"""Regression tests for the session file index (session_registry.py)."""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from session_registry import SESSION_DIR, SessionRegistry, get_session_file
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(SESSION_DIR)
+    return SessionRegistry()
+
+
+def write_session(session_id, last_accessed):
+    with open(get_session_file(session_id), 'w') as f:
+        json.dump({"username": "alice", "last_accessed": last_accessed.isoformat()}, f)
+
+
+def test_session_written_after_the_first_scan_is_loaded(registry):
+    write_session("late", datetime.now())
+
+    assert registry.session_status("late") == "unindexed"
+    assert registry.load_session("late")["username"] == "alice"
+    assert registry.session_status("late") == "live"
+
+
+def test_sweep_keeps_sessions_refreshed_outside_the_registry(registry):
+    write_session("stale", datetime.now() - timedelta(days=2))
+    write_session("refreshed", datetime.now() - timedelta(days=2))
+    registry.sync_index()
+    write_session("refreshed", datetime.now())
+
+    assert registry.sweep_expired() == 1
+    assert not os.path.exists(get_session_file("stale"))
+    assert registry.session_status("refreshed") == "live"
@@ -0,0 +1,47 @@
+"""Regression tests for the dashboard task store (task_store.py)."""
+
+import json
+import os
+
+import pytest
+
+from task_store import TaskStore, get_tasks_file
+
+
+@pytest.fixture(autouse=True)
+def tasks_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_two_tabs_do_not_overwrite_each_other():
+    tab_a = TaskStore.load("alice")
+    tab_b = TaskStore.load("alice")
+
+    first = tab_a.add_task("Lab record")
+    second = tab_b.add_task("Assignment 2")
+    tab_a.finish_task(first)
+
+    assert [task["id"] for task in tab_b.get_tasks()] == [second]
+    assert second in tab_a
+    assert len(TaskStore.load("alice")) == 1
+
+
+def test_tasks_are_per_user_and_ordered_by_due_date():
+    store = TaskStore.load("alice")
+    store.add_task("Undated")
+    store.add_task("Later", due="2026-03-20")
+    store.add_task("Sooner", due="2026-03-14")
+    TaskStore.load("bob").add_task("Someone else's")
+
+    assert [task["title"] for task in store.get_tasks()] == ["Sooner", "Later", "Undated"]
+
+
+def test_json_task_file_is_imported_once():
+    path = get_tasks_file("alice")
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        json.dump([{"id": "abc", "title": "Old task", "due": None, "created_at": "2026-01-01T00:00:00"}], f)
+
+    assert TaskStore.load("alice").get_task("abc")["title"] == "Old task"
+    assert not os.path.exists(path)
+    assert len(TaskStore.load("alice")) == 1
@@ -0,0 +1,225 @@
+"""Date-indexed deadline timeline built from assignment materials.
+
+PESU Academy does not expose due dates for materials, so a deadline is taken
+from a date written in the assignment title (e.g. "Assignment 2 - 14-03-2026").
+Assignments without a recognisable date are kept as undated entries.
+
+The timeline is assembled from what the app already stores: the course list,
+unit and topic lists and assignment lists in the shared cache, and assignment
+lists in the synced course trees (see course_sync.py). Only what is missing
+from both is fetched, in one background operation.
+"""
+
+import asyncio
+import bisect
+import datetime as dt
+import re
+import threading
+
+from pesu_client import SessionExpired, check_session, run_pesu
+from scheduler import BACKGROUND, limited, request_limiter
+from cache_backend import get_cache, cache_key, catalog_ttl, CATALOG_TTL
+from course_sync import load_snapshot
+from course_tree import ASSIGNMENT_MATERIAL_TYPE
+
+MONTHS = {
+    name: idx for idx, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1
+    )
+}
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})\b")
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+NAMED_DATE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3})[a-z]*\.?,?\s+(\d{4})\b")
+
+
+def parse_deadline(text):
+    """Extract the first date found in text, or None."""
+    candidates = []
+    match = ISO_DATE.search(text)
+    if match:
+        candidates.append((int(match.group(1)), int(match.group(2)), int(match.group(3))))
+    match = NUMERIC_DATE.search(text)
+    if match:
+        year = int(match.group(3))
+        year = year + 2000 if year < 100 else year
+        candidates.append((year, int(match.group(2)), int(match.group(1))))
+    match = NAMED_DATE.search(text)
+    if match and match.group(2).lower() in MONTHS:
+        candidates.append((int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1))))
+    for year, month, day in candidates:
+        try:
+            return dt.date(year, month, day)
+        except ValueError:
+            continue
+    return None
+
+
+class DeadlineTimeline:
+    """Entries kept sorted by date so upcoming deadlines are a range query."""
+
+    def __init__(self):
+        self.dates = []
+        self.entries = []
+        self.undated = []
+        self.built_at = None
+
+    def add(self, date, entry):
+        if date is None:
+            self.undated.append(entry)
+            return
+        idx = bisect.bisect_right(self.dates, date)
+        self.dates.insert(idx, date)
+        self.entries.insert(idx, entry)
+
+    def between(self, start, end):
+        """Return (date, entry) pairs with start <= date <= end."""
+        lo = bisect.bisect_left(self.dates, start)
+        hi = bisect.bisect_right(self.dates, end)
+        return list(zip(self.dates[lo:hi], self.entries[lo:hi]))
+
+    def upcoming(self, days=14, today=None):
+        today = today or dt.date.today()
+        return self.between(today, today + dt.timedelta(days=days))
+
+    def __len__(self):
+        return len(self.entries) + len(self.undated)
+
+
+class _NeedsUpstream(Exception):
+    """Raised while collecting offline when something has to be fetched."""
+
+
+async def _collect_assignments(username, semester, pesu=None):
+    """(course, unit title, topic title, title, url) assignment rows, fetching only what is not stored.
+
+    With pesu=None nothing is fetched and _NeedsUpstream is raised instead.
+    """
+    cache = get_cache()
+    semaphore = request_limiter() if pesu is not None else None
+
+    async def cached(key, fetch):
+        value = cache.get(key)
+        if value is None:
+            if pesu is None:
+                raise _NeedsUpstream(key)
+            value = await limited(semaphore, fetch())
+            check_session(pesu)
+            cache.set(key, value, ttl=catalog_ttl(value))
+        return value
+
+    courses = (await cached(cache_key("courses", username, semester), lambda: pesu.get_courses(semester))).get(semester, [])
+
+    async def course_rows(course):
+        snapshot = load_snapshot(course.id)
+        rows = []
+        for unit in await cached(cache_key("units", course.id), lambda: pesu.get_units_for_course(course.id)):
+            unit_node = snapshot["units"].get(unit.id, {"topics": {}})
+            topics = await cached(cache_key("topics", unit.id), lambda unit=unit: pesu.get_topics_for_unit(unit.id))
+            for topic in topics or []:
+                synced = unit_node["topics"].get(topic.id, {"materials": {}})["materials"].get(ASSIGNMENT_MATERIAL_TYPE)
+                if synced and synced.get("checked_at"):
+                    materials = [(item["title"], item["url"]) for item in synced["items"]]
+                else:
+                    links = await cached(
+                        cache_key("materials", topic.id, ASSIGNMENT_MATERIAL_TYPE),
+                        lambda topic=topic: pesu.get_material_links(topic, ASSIGNMENT_MATERIAL_TYPE),
+                    )
+                    materials = [(link.title, link.url) for link in links or []]
+                rows.extend((course, unit.title, topic.title, title, url) for title, url in materials)
+        return rows
+
+    per_course = await asyncio.gather(*(course_rows(course) for course in courses), return_exceptions=True)
+    for rows in per_course:
+        # Other failures only leave that course out
+        if isinstance(rows, (_NeedsUpstream, SessionExpired)):
+            raise rows
+    return [row for rows in per_course if not isinstance(rows, Exception) for row in rows]
+
+
+async def build_timeline(username, password, semester):
+    """Index the assignments of every current course by date.
+
+    Runs offline when the cache and synced trees cover everything; otherwise
+    takes one background scheduler slot to fetch the missing lists.
+    """
+    try:
+        rows = await _collect_assignments(username, semester)
+    except _NeedsUpstream:
+        rows = await run_pesu(
+            username, password, lambda pesu: _collect_assignments(username, semester, pesu), priority=BACKGROUND
+        )
+
+    timeline = DeadlineTimeline()
+    for course, unit_title, topic_title, title, url in rows:
+        timeline.add(
+            parse_deadline(f"{title} {topic_title}"),
+            {
+                "course": f"{course.code} - {course.title}",
+                "unit": unit_title,
+                "topic": topic_title,
+                "title": title,
+                "url": url,
+            }
+        )
+    timeline.built_at = dt.datetime.now()
+    return timeline
+
+
+# How long a failed build is reported before another one is attempted (seconds)
+FAILURE_TTL = 5 * 60
+
+_builds = {}
+_builds_lock = threading.Lock()
+
+
+def get_timeline(username, semester):
+    """Return the cached timeline for a user and semester, or None if not built yet."""
+    return get_cache().get(cache_key("timeline", username, semester))
+
+
+def get_timeline_error(username, semester):
+    """Error message of a recent failed build, or None."""
+    failure = get_cache().get(cache_key("timeline_error", username, semester))
+    return failure["error"] if failure else None
+
+
+def clear_timeline_error(username, semester):
+    get_cache().delete(cache_key("timeline_error", username, semester))
+
+
+def start_timeline_build(username, password, semester):
+    """Build the timeline in a background thread.
+
+    Returns False if one is already running or a recent build failed; the
+    failure is kept for FAILURE_TTL so renders do not retry it on every run.
+    """
+    key = cache_key("timeline", username, semester)
+    error_key = cache_key("timeline_error", username, semester)
+    with _builds_lock:
+        running = _builds.get(key)
+        if running is not None and running.is_alive():
+            return False
+        if get_cache().get(error_key) is not None:
+            return False
+
+        def run():
+            try:
+                timeline = asyncio.run(build_timeline(username, password, semester))
+                get_cache().set(key, timeline, ttl=CATALOG_TTL)
+            except Exception as e:
+                get_cache().set(error_key, {"error": str(e) or type(e).__name__}, ttl=FAILURE_TTL)
+            finally:
+                with _builds_lock:
+                    _builds.pop(key, None)
+
+        thread = threading.Thread(target=run, name=f"timeline-{semester}", daemon=True)
+        _builds[key] = thread
+        thread.start()
+    return True
+
+
+def is_timeline_building(username, semester):
+    with _builds_lock:
+        thread = _builds.get(cache_key("timeline", username, semester))
+        return thread is not None and thread.is_alive()
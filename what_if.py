@@ -0,0 +1,101 @@
+"""What-if simulator: marks needed in unreported assessments to reach a target.
+
+Assessments whose marks are not numbers yet (blank, "-", "NA") are unknowns.
+For every course and grade band, the marks still needed follow directly from
+the band boundary, and one broadcast computes the whole table. Reaching an
+SGPA target means picking a band for every course. Thousands of random
+assignments of reachable bands are scored at once as (scenario x course)
+arrays. The cheapest feasible one, by total marks still to score, is kept for
+each target. Results are cached per user, semester and results content.
+"""
+
+import hashlib
+
+import numpy as np
+
+from cache_backend import get_cache, cache_key, RESULTS_TTL
+from page_utils import GRADE_BOUNDARIES, parse_mark
+
+GRADE_POINTS = {"A+": 10, "A": 9, "B+": 8, "B": 7, "C": 6, "F": 0}
+SCENARIOS = 20000
+SGPA_TARGETS = [round(t, 1) for t in np.arange(6.0, 10.01, 0.5)]
+SEED = 7
+
+
+def _credits(course):
+    credits = getattr(course, "credits", None)
+    return parse_mark(getattr(credits, "total", credits)) or 0.0
+
+
+def course_arrays(results):
+    """Per-course known marks, known total, unreported total and credits."""
+    known, known_total, missing_total, credits = [], [], [], []
+    for course in results.courses:
+        marks = [(parse_mark(a.marks), parse_mark(a.total) or 0.0) for a in course.assessments]
+        known.append(sum(m for m, _ in marks if m is not None))
+        known_total.append(sum(t for m, t in marks if m is not None))
+        missing_total.append(sum(t for m, t in marks if m is None))
+        credits.append(_credits(course))
+    return tuple(np.array(values, dtype=float) for values in (known, known_total, missing_total, credits))
+
+
+def simulate(results, targets=SGPA_TARGETS, scenarios=SCENARIOS, seed=SEED):
+    """Marks needed per course for each grade band, and a cheapest plan per SGPA target."""
+    bands = [grade for _, grade in GRADE_BOUNDARIES]
+    boundaries = np.array([boundary for boundary, _ in GRADE_BOUNDARIES], dtype=float)
+    points = np.array([GRADE_POINTS[grade] for grade in bands] + [GRADE_POINTS["F"]], dtype=float)
+    known, known_total, missing_total, credits = course_arrays(results)
+    possible = known_total + missing_total
+
+    # (course x band) marks still needed; inf where the band is out of reach
+    needed = np.clip(boundaries[None, :] / 100 * possible[:, None] - known[:, None], 0, None)
+    needed[needed > missing_total[:, None] + 1e-9] = np.inf
+    # Falling back to F needs nothing
+    needed = np.concatenate([needed, np.zeros((len(known), 1))], axis=1)
+
+    # Reachable bands are a suffix of the band list, starting at best[i]
+    best = np.isinf(needed).sum(axis=1)
+    # Random reachable band per course per scenario, plus "every course in band b or its best"
+    rng = np.random.default_rng(seed)
+    spread = len(points) - best
+    choice = best + (rng.random((scenarios, len(known))) * spread).astype(int)
+    uniform = np.maximum(np.arange(len(points))[:, None], best[None, :])
+    choice = np.concatenate([choice, uniform])
+    cost = np.take_along_axis(needed.T, choice, axis=0).sum(axis=1) if len(known) else np.zeros(len(choice))
+    total_credits = credits.sum()
+    sgpa = (points[choice] * credits).sum(axis=1) / total_credits if total_credits else np.zeros(len(choice))
+
+    plans = {}
+    for target in targets:
+        feasible = np.where((sgpa >= target - 1e-9) & np.isfinite(cost))[0]
+        if not len(feasible):
+            plans[str(target)] = None
+            continue
+        cheapest = choice[feasible[np.argmin(cost[feasible])]]
+        plans[str(target)] = [
+            {"grade": (bands + ["F"])[band], "needed": round(float(needed[i, band]), 1)}
+            for i, band in enumerate(cheapest)
+        ]
+
+    return {
+        "courses": [course.code for course in results.courses],
+        "remaining": [float(m) for m in missing_total],
+        "bands": {
+            grade: [None if np.isinf(v) else round(float(v), 1) for v in needed[:, b]]
+            for b, grade in enumerate(bands)
+        },
+        "plans": plans,
+    }
+
+
+def get_simulation(username, semester, results):
+    """Cached simulate() output for a user's semester."""
+    cache = get_cache()
+    # Refetched results with new marks must not reuse an older simulation
+    digest = hashlib.sha1(results.model_dump_json().encode()).hexdigest()[:16]
+    key = cache_key("what_if", username, semester, digest)
+    simulation = cache.get(key)
+    if simulation is None:
+        simulation = simulate(results)
+        cache.set(key, simulation, ttl=RESULTS_TTL)
+    return simulation